@@ -0,0 +1,77 @@
+"""
+Compare two result files of `load.py` or of `micro.py`.
+
+Prints the change of every metric of the candidate against the baseline and exits with 1
+when a metric regressed by more than --threshold percent.
+
+    python benchmarks/compare.py baseline.json candidate.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# metric path -> whether larger values are better
+METRICS = {
+    ("latency_ms", "p50"): False,
+    ("latency_ms", "p99"): False,
+    ("ttft_ms", "p50"): False,
+    ("ttft_ms", "p99"): False,
+    ("requests_per_s",): True,
+    ("bridge", "cpu_percent"): False,
+    ("bridge", "rss_peak_mb"): False,
+    ("per_call_us", "min"): False,
+    ("per_call_us", "median"): False,
+}
+
+
+def lookup(result: dict[str, Any], path: tuple[str, ...]) -> Optional[float]:
+    value: Any = result
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        value = value[key]
+    return value
+
+
+def changes(baseline: dict[str, Any], candidate: dict[str, Any]) -> Iterator[tuple[str, str, float, float, float, bool]]:
+    for name, result in candidate.items():
+        if name not in baseline:
+            continue
+        for path, higher_is_better in METRICS.items():
+            before, after = lookup(baseline[name], path), lookup(result, path)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            yield name, ".".join(path), before, after, change, (-change if higher_is_better else change)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    key = "scenarios" if "scenarios" in candidate else "benchmarks"
+
+    regressions = 0
+    print(f"{'benchmark':<32} {'metric':<22} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name, metric, before, after, change, regression in changes(baseline[key], candidate[key]):
+        flag = ""
+        if regression > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<32} {metric:<22} {before:>12.3f} {after:>12.3f} {change:>+8.1f}%{flag}")
+
+    if regressions:
+        print(f"{regressions} metrics regressed by more than {args.threshold}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Load driver for MCP-Bridge.
+
+Starts the mock inference server, the bridge (with the mock stdio MCP server in a
+generated config) and runs each scenario with a fixed number of requests at a fixed
+concurrency. Latency percentiles, time to first token, requests/s and the CPU and RSS
+of the bridge process are written as JSON, compare two runs with `compare.py`.
+
+    python benchmarks/load.py --requests 500 --concurrency 16 --output results.json
+
+Pass --bridge-url (and --bridge-pid for CPU/RSS) to measure an already running bridge.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack, ExitStack
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+
+SCENARIOS = ("chat", "chat_stream", "tools_list", "tools_call", "sse")
+
+# a request returns its time to first token, or None when it has no such notion
+Request = Callable[[], Awaitable[Optional[float]]]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--model", default="mock")
+    parser.add_argument("--output", default=None, help="result file, defaults to benchmarks/results/<timestamp>.json")
+
+    mock = parser.add_argument_group("mock servers")
+    mock.add_argument("--completion-tokens", type=int, default=64)
+    mock.add_argument("--tokens-per-second", type=float, default=0)
+    mock.add_argument("--prefill-latency", type=float, default=0)
+    mock.add_argument("--tool-rounds", type=int, default=1)
+    mock.add_argument("--parallel-tool-calls", type=int, default=1)
+    mock.add_argument("--tool-latency", type=float, default=0)
+    mock.add_argument("--filler-tools", type=int, default=0)
+
+    external = parser.add_argument_group("external bridge")
+    external.add_argument("--bridge-url", default=None, help="measure this bridge instead of starting one")
+    external.add_argument("--bridge-pid", type=int, default=None, help="process sampled for CPU/RSS")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn(command: list[str], log: Path, **kwargs: Any) -> subprocess.Popen:
+    with log.open("wb") as log_file:
+        return subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, **kwargs)
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def bridge_config(args: argparse.Namespace, inference_port: int, bridge_port: int) -> dict[str, Any]:
+    return {
+        "inference_server": {"base_url": f"http://127.0.0.1:{inference_port}/v1", "api_key": "benchmark"},
+        "mcp_servers": {
+            "benchmark": {
+                "server": {
+                    "command": sys.executable,
+                    "args": [
+                        str(HERE / "mock_mcp_server.py"),
+                        "--latency", str(args.tool_latency),
+                        "--filler-tools", str(args.filler_tools),
+                    ],
+                }
+            }
+        },
+        "sampling": {"models": [{"model": args.model}]},
+        "network": {"host": "127.0.0.1", "port": bridge_port},
+        "logging": {"log_level": "INFO"},
+    }
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, log: Path, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{process.args} exited with {process.returncode}, see {log}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} was not ready after {timeout}s, see {log}")
+
+
+class ProcessSampler:
+    """CPU time and peak RSS of a process, read from /proc"""
+
+    def __init__(self, pid: Optional[int]) -> None:
+        self.pid = pid if pid is not None and Path(f"/proc/{pid}/stat").exists() else None
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if self.pid is not None else 1
+        self.peak_rss = 0
+
+    def cpu_seconds(self) -> float:
+        fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.clock_ticks  # utime + stime
+
+    def rss_bytes(self) -> int:
+        for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+        return 0
+
+    async def watch_rss(self) -> None:
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+            await asyncio.sleep(0.1)
+
+    async def measure(self, run: Awaitable[Any]) -> tuple[Any, Optional[dict[str, float]]]:
+        if self.pid is None:
+            return await run, None
+
+        self.peak_rss = 0
+        watcher = asyncio.create_task(self.watch_rss())
+        cpu, started = self.cpu_seconds(), time.monotonic()
+        try:
+            result = await run
+        finally:
+            watcher.cancel()
+        wall = time.monotonic() - started
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+        return result, {
+            "cpu_percent": round((self.cpu_seconds() - cpu) / wall * 100, 1),
+            "rss_peak_mb": round(self.peak_rss / 2**20, 1),
+        }
+
+
+def percentiles(values: list[float]) -> Optional[dict[str, float]]:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {
+        "p50": rank(50),
+        "p90": rank(90),
+        "p99": rank(99),
+        "max": round(ordered[-1] * 1000, 3),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+
+
+async def run_load(workers: list[Request], total: int) -> dict[str, Any]:
+    """Send `total` requests spread over the workers, one request in flight per worker"""
+    latencies: list[float] = []
+    ttfts: list[float] = []
+    errors: list[str] = []
+    remaining = total
+
+    async def worker(request: Request) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.monotonic()
+            try:
+                first_token = await request()
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            latencies.append(time.monotonic() - started)
+            if first_token is not None:
+                ttfts.append(first_token - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(request) for request in workers))
+    wall = time.monotonic() - started
+
+    return {
+        "requests": total,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "duration_s": round(wall, 3),
+        "requests_per_s": round(len(latencies) / wall, 2),
+        "latency_ms": percentiles(latencies),
+        "ttft_ms": percentiles(ttfts),
+    }
+
+
+def chat_body(args: argparse.Namespace, stream: bool) -> dict[str, Any]:
+    return {
+        "model": args.model,
+        "messages": [{"role": "user", "content": "Call the echo tool, then answer."}],
+        "stream": stream,
+    }
+
+
+def http_scenario(client: httpx.AsyncClient, args: argparse.Namespace, name: str) -> Request:
+    async def chat() -> None:
+        response = await client.post("/v1/chat/completions", json=chat_body(args, False))
+        response.raise_for_status()
+        if not response.json().get("choices"):
+            raise RuntimeError(response.text)
+
+    async def chat_stream() -> float:
+        first_token: Optional[float] = None
+        async with client.stream("POST", "/v1/chat/completions", json=chat_body(args, True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if first_token is None and line.startswith("data:") and '"content"' in line:
+                    first_token = time.monotonic()
+        if first_token is None:
+            raise RuntimeError("stream ended without content")
+        return first_token
+
+    async def tools_list() -> None:
+        response = await client.get("/mcp/tools")
+        response.raise_for_status()
+
+    async def tools_call() -> None:
+        response = await client.post("/mcp/tools/echo/call", json={"text": "benchmark"})
+        response.raise_for_status()
+        if response.json().get("isError"):
+            raise RuntimeError(response.text)
+
+    return {"chat": chat, "chat_stream": chat_stream, "tools_list": tools_list, "tools_call": tools_call}[name]
+
+
+async def run_sse(bridge_url: str, args: argparse.Namespace, sampler: ProcessSampler) -> tuple[dict[str, Any], Any]:
+    """Tool calls through the SSE bridge, one session per worker, session setup is not measured"""
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    # closing SSE sessions may raise, it is not part of the measurement
+    stack = AsyncExitStack()
+    try:
+        sessions = []
+        for _ in range(args.concurrency):
+            streams = await stack.enter_async_context(sse_client(f"{bridge_url}/mcp-server/sse"))
+            session = await stack.enter_async_context(ClientSession(*streams))
+            await session.initialize()
+            sessions.append(session)
+
+        def call(session: ClientSession) -> Request:
+            async def request() -> None:
+                result = await session.call_tool("echo", {"text": "benchmark"})
+                if result.isError:
+                    raise RuntimeError(result.content)
+
+            return request
+
+        workers = [call(session) for session in sessions]
+        await run_load(workers, args.warmup)
+        return await sampler.measure(run_load(workers, args.requests))
+    finally:
+        try:
+            await stack.aclose()
+        except Exception:
+            pass
+
+
+async def run_scenarios(bridge_url: str, args: argparse.Namespace, sampler: ProcessSampler) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=bridge_url, timeout=120, limits=limits) as client:
+        for name in args.scenarios.split(","):
+            name = name.strip()
+            if name not in SCENARIOS:
+                raise SystemExit(f"unknown scenario {name}, choose from {', '.join(SCENARIOS)}")
+
+            print(f"running {name}: {args.requests} requests at concurrency {args.concurrency}", file=sys.stderr)
+            if name == "sse":
+                result, resources = await run_sse(bridge_url, args, sampler)
+            else:
+                workers = [http_scenario(client, args, name)] * args.concurrency
+                await run_load(workers, args.warmup)
+                result, resources = await sampler.measure(run_load(workers, args.requests))
+
+            result["bridge"] = resources
+            results[name] = result
+            print(json.dumps({name: result}), file=sys.stderr)
+
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    args = parse_args()
+    output = Path(args.output) if args.output else HERE / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    # the logs are kept next to the results, they are needed most when a run fails
+    log_dir = output.with_name(f"{output.stem}-logs")
+
+    # the stack is left first, so the processes are stopped before their work dir is removed
+    with tempfile.TemporaryDirectory(prefix="mcp-bridge-bench-") as workdir, ExitStack() as stack:
+        bridge_url, bridge_pid = args.bridge_url, args.bridge_pid
+        if bridge_url is None:
+            inference_port, bridge_port = free_port(), free_port()
+            log_dir.mkdir(parents=True, exist_ok=True)
+            inference_log, bridge_log = log_dir / "inference.log", log_dir / "bridge.log"
+
+            inference = spawn(
+                [
+                    sys.executable, str(HERE / "mock_inference.py"),
+                    "--port", str(inference_port),
+                    "--completion-tokens", str(args.completion_tokens),
+                    "--tokens-per-second", str(args.tokens_per_second),
+                    "--prefill-latency", str(args.prefill_latency),
+                    "--tool-rounds", str(args.tool_rounds),
+                    "--parallel-tool-calls", str(args.parallel_tool_calls),
+                ],
+                inference_log,
+            )
+            stack.callback(stop, inference)
+            wait_until_ready(f"http://127.0.0.1:{inference_port}/v1/models", inference, inference_log)
+
+            config_file = Path(workdir, "config.json")
+            config_file.write_text(json.dumps(bridge_config(args, inference_port, bridge_port)))
+            # run from the work dir so a local .env or config.json does not leak into the run
+            bridge = spawn(
+                [sys.executable, "-m", "mcp_bridge.main"],
+                bridge_log,
+                cwd=workdir,
+                env={**os.environ, "MCP_BRIDGE__CONFIG__FILE": str(config_file), "PYTHONPATH": str(ROOT)},
+            )
+            stack.callback(stop, bridge)
+            bridge_url, bridge_pid = f"http://127.0.0.1:{bridge_port}", bridge.pid
+            wait_until_ready(f"{bridge_url}/ready", bridge, bridge_log)
+
+        results = asyncio.run(run_scenarios(bridge_url, args, ProcessSampler(bridge_pid)))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": results,
+    }
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
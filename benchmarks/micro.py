@@ -0,0 +1,443 @@
+"""
+Micro-benchmarks of the CPU work MCP-Bridge does per request or per streamed chunk.
+
+Every benchmark runs on fixed, generated inputs, so a change of its time is a change of
+the code. The bridge is configured from a generated config, no servers are started.
+
+    python benchmarks/micro.py --output baseline.json
+    python benchmarks/micro.py --filter stream --repeat 10
+    python benchmarks/compare.py baseline.json candidate.json
+
+Results are the time per call in microseconds, min/median/max over --repeat runs.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from load import git_commit
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT))
+
+SERVERS = 8
+TOOLS_PER_SERVER = 50
+SAMPLING_MODELS = 32
+CONVERSATION_MESSAGES = 200
+
+Call = Callable[[], Union[Any, Awaitable[Any]]]
+BENCHMARKS: dict[str, Callable[[], tuple[Call, bool]]] = {}
+
+
+def benchmark(name: str, is_async: bool = False):
+    """Register a setup function returning the call to time"""
+
+    def register(setup: Callable[[], Call]) -> Callable[[], Call]:
+        BENCHMARKS[name] = lambda: (setup(), is_async)
+        return setup
+
+    return register
+
+
+# inputs
+
+
+def tool_schema(index: int) -> dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": f"What tool {index} looks up"},
+            "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+            "filters": {
+                "type": "object",
+                "properties": {
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                    "since": {"type": "string", "format": "date-time"},
+                },
+            },
+        },
+        "required": ["query"],
+    }
+
+
+def mcp_tools(server: int, count: int) -> list:
+    from mcp import Tool
+
+    return [
+        Tool(
+            name=f"s{server}_tool_{index}",
+            description=f"Tool {index} of server {server}, " + "with a realistic description " * 4,
+            inputSchema=tool_schema(index),
+        )
+        for index in range(count)
+    ]
+
+
+def bridge_config() -> dict[str, Any]:
+    return {
+        "inference_server": {"base_url": "http://127.0.0.1:1/v1"},
+        "mcp_servers": {
+            f"server_{server}": {
+                "server": {"command": sys.executable, "args": ["-c", "pass"]},
+                "lifecycle": "lazy",
+                # a few rules, so the access policy does real work
+                "disallowed_tools": [f"s{server}_tool_{index}" for index in range(0, TOOLS_PER_SERVER, 10)],
+                **({"disallowed_models": ["other-model"]} if server % 2 else {}),
+            }
+            for server in range(SERVERS)
+        },
+        "sampling": {
+            "models": [
+                {
+                    "model": f"model-{index}",
+                    "intelligence": (index % 8) / 7,
+                    "speed": (index // 8 % 4) / 3,
+                    "cost": ((index * 5) % 32) / 31,
+                }
+                for index in range(SAMPLING_MODELS)
+            ]
+        },
+        "catalog": {"ttl": 10**9},
+        "logging": {"log_level": "INFO"},
+    }
+
+
+def load_bridge_config(workdir: str) -> None:
+    """Point the bridge at the generated config before its first import"""
+    config_file = Path(workdir, "config.json")
+    config_file.write_text(json.dumps(bridge_config()))
+    os.environ["MCP_BRIDGE__CONFIG__FILE"] = str(config_file)
+    os.environ.pop("MCP_BRIDGE__CONFIG__JSON", None)
+    os.environ.pop("MCP_BRIDGE__CONFIG__HTTP_URL", None)
+
+    # the settings parse the command line and read .env from the working directory
+    argv, cwd = sys.argv, os.getcwd()
+    sys.argv = sys.argv[:1]
+    os.chdir(workdir)
+    try:
+        import mcp_bridge.config  # noqa: F401
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+
+
+def register_catalogs() -> None:
+    from mcp_bridge.config import config
+    from mcp_bridge.mcp_clients.McpClientManager import ClientManager
+    from mcp_bridge.mcp_clients.StdioClient import StdioClient
+    from mcp_bridge.models.serverCatalog import ServerCatalog
+
+    if ClientManager.clients:
+        return
+
+    for server, (name, server_config) in enumerate(config.mcp_servers.items()):
+        ClientManager.clients[name] = StdioClient(name, server_config.server)
+        ClientManager.catalogs[name] = ServerCatalog(tools=mcp_tools(server, TOOLS_PER_SERVER))
+    ClientManager._rebuild_index()
+
+
+def conversation(messages: int) -> Any:
+    from lmos_openai_types import CreateChatCompletionRequest
+
+    history: list[dict[str, Any]] = [{"role": "system", "content": "You are a helpful assistant. " * 20}]
+    for turn in range(messages // 3):
+        call_id = f"call_{turn:06d}"
+        history += [
+            {"role": "user", "content": f"Question {turn}: " + "please look this up " * 10},
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": call_id,
+                        "type": "function",
+                        "function": {"name": "s0_tool_1", "arguments": json.dumps({"query": f"topic {turn}", "limit": 5})},
+                    }
+                ],
+            },
+            {"role": "tool", "tool_call_id": call_id, "content": [{"type": "text", "text": "result line\n" * 40}]},
+        ]
+
+    return CreateChatCompletionRequest.model_validate({"model": "model-0", "messages": history, "stream": True})
+
+
+def stream_chunk(delta: dict[str, Any], finish_reason: Optional[str] = None) -> str:
+    return json.dumps(
+        {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "model-0",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+        }
+    )
+
+
+def tool_call_stream(tool_calls: int, fragments: int) -> list[str]:
+    """Chunks of a streamed answer with tool calls, the arguments split into fragments"""
+    chunks = []
+    for index in range(tool_calls):
+        arguments = json.dumps({"query": f"topic {index} " * 20, "limit": 10, "filters": {"tags": ["a", "b"]}})
+        size = -(-len(arguments) // fragments)
+        for fragment in range(fragments):
+            delta: dict[str, Any] = {"index": index, "function": {"arguments": arguments[fragment * size : (fragment + 1) * size]}}
+            if fragment == 0:
+                delta.update(id=f"call_{index}", type="function")
+                delta["function"]["name"] = "s0_tool_1"
+            chunks.append(stream_chunk({"tool_calls": [delta]}))
+    return chunks
+
+
+# benchmarks
+
+
+@benchmark("mcp2openai_catalog_400")
+def bench_mcp2openai() -> Call:
+    from mcp_bridge.tool_mappers import mcp2openai
+
+    tools = [tool for server in range(SERVERS) for tool in mcp_tools(server, TOOLS_PER_SERVER)]
+    return lambda: [mcp2openai(tool) for tool in tools]
+
+
+def add_tools_call(cold: bool) -> Call:
+    from lmos_openai_types import CreateChatCompletionRequest
+    from mcp_bridge.mcp_clients.McpClientManager import ClientManager
+    from mcp_bridge.openai_clients.utils import chat_completion_add_tools
+
+    register_catalogs()
+    request = CreateChatCompletionRequest.model_validate(
+        {"model": "model-0", "messages": [{"role": "user", "content": "hello"}]}
+    )
+
+    async def call() -> None:
+        if cold:
+            # as if a catalog changed, the tools are filtered and converted again
+            ClientManager.catalog_version += 1
+        await chat_completion_add_tools(request)
+
+    return call
+
+
+@benchmark("add_tools_warm_400", is_async=True)
+def bench_add_tools_warm() -> Call:
+    return add_tools_call(cold=False)
+
+
+@benchmark("add_tools_cold_400", is_async=True)
+def bench_add_tools_cold() -> Call:
+    return add_tools_call(cold=True)
+
+
+@benchmark("stream_read_content_chunk")
+def bench_read_chunk() -> Call:
+    from mcp_bridge.openai_clients.streamChatCompletion import read_chunk
+
+    chunk = stream_chunk({"content": "token "})
+    return lambda: read_chunk(chunk)
+
+
+@benchmark("stream_tool_call_chunks_2x40")
+def bench_tool_call_chunks() -> Call:
+    from lmos_openai_types import CreateChatCompletionStreamResponse
+    from mcp_bridge.openai_clients.streamChatCompletion import ToolCallAccumulator, read_chunk
+
+    chunks = tool_call_stream(tool_calls=2, fragments=40)
+
+    def call() -> None:
+        # the per chunk work of the stream loop for chunks carrying tool calls
+        accumulator = ToolCallAccumulator("model-0")
+        for data in chunks:
+            _, _, has_tool_calls = read_chunk(data)
+            if has_tool_calls:
+                parsed = CreateChatCompletionStreamResponse.model_validate_json(data)
+                accumulator.add(parsed.choices[0].delta.tool_calls)
+        accumulator.to_tool_calls()
+
+    return call
+
+
+@benchmark("stream_json_scanner_2kb")
+def bench_json_scanner() -> Call:
+    from mcp_bridge.openai_clients.streamChatCompletion import JsonCompletionScanner
+
+    arguments = json.dumps({"query": "a \"quoted\" topic " * 100, "nested": {"list": list(range(50))}})
+    fragments = [arguments[index : index + 8] for index in range(0, len(arguments), 8)]
+
+    def call() -> None:
+        scanner = JsonCompletionScanner()
+        for fragment in fragments:
+            scanner.feed(fragment)
+
+    return call
+
+
+@benchmark("substitute_env_vars_200_servers")
+def bench_substitute_env_vars() -> Call:
+    from mcp_bridge.config.env_subst import substitute_env_vars
+
+    env = {f"VAR_{index}": f"value-{index}" for index in range(100)}
+    config = {
+        "mcp_servers": {
+            f"server_{server}": {
+                "server": {
+                    "command": "uvx",
+                    "args": ["mcp-server", "--token", f"${{VAR_{server % 100}}}", "--verbose"],
+                    "env": {f"KEY_{key}": f"prefix-${{VAR_{(server + key) % 100}}}-suffix" for key in range(10)},
+                },
+                "allowed_models": ["model-0", "model-1"],
+                "disabled": False,
+                "ping_interval": 10,
+            }
+            for server in range(200)
+        }
+    }
+    return lambda: substitute_env_vars(config, env)
+
+
+@benchmark("find_best_model_32")
+def bench_find_best_model() -> Call:
+    from mcp.types import ModelPreferences
+    from mcp_bridge.sampling.modelSelector import find_best_model
+
+    preferences = ModelPreferences(intelligencePriority=0.8, speedPriority=0.3, costPriority=0.5)
+    return lambda: find_best_model(preferences)
+
+
+@benchmark("model_dump_json_conversation_200")
+def bench_model_dump() -> Call:
+    from mcp_bridge.openai_clients.requestSerializer import dump_options
+
+    request = conversation(CONVERSATION_MESSAGES)
+    return lambda: request.model_dump_json(**dump_options)
+
+
+@benchmark("serializer_first_round_200")
+def bench_serializer_cold() -> Call:
+    from mcp_bridge.openai_clients.requestSerializer import ChatRequestSerializer
+
+    request = conversation(CONVERSATION_MESSAGES)
+    return lambda: ChatRequestSerializer(request).serialize()
+
+
+@benchmark("serializer_next_round_200")
+def bench_serializer_warm() -> Call:
+    from mcp_bridge.openai_clients.requestSerializer import ChatRequestSerializer
+
+    request = conversation(CONVERSATION_MESSAGES)
+    serializer = ChatRequestSerializer(request)
+    serializer.serialize()
+    # a later round only serializes what was appended, here nothing, so this is the fixed cost
+    return serializer.serialize
+
+
+# runner
+
+
+def timer(call: Call, is_async: bool, loop: asyncio.AbstractEventLoop) -> Callable[[int], float]:
+    """Seconds `number` calls take, async calls are awaited in one event loop run"""
+
+    async def run_async(number: int) -> None:
+        for _ in range(number):
+            await call()  # type: ignore[misc]
+
+    def run(number: int) -> float:
+        started = time.perf_counter()
+        if is_async:
+            loop.run_until_complete(run_async(number))
+        else:
+            for _ in range(number):
+                call()
+        return time.perf_counter() - started
+
+    return run
+
+
+def autorange(run: Callable[[int], float], min_time: float) -> int:
+    number = 1
+    while True:
+        if run(number) >= min_time:
+            return number
+        number *= 2
+
+
+def measure(name: str, args: argparse.Namespace, loop: asyncio.AbstractEventLoop) -> dict[str, Any]:
+    call, is_async = BENCHMARKS[name]()
+    run = timer(call, is_async, loop)
+    number = args.number or autorange(run, args.min_time)
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times = [run(number) / number * 1_000_000 for _ in range(args.repeat)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        "number": number,
+        "repeat": args.repeat,
+        "per_call_us": {
+            "min": round(min(times), 3),
+            "median": round(statistics.median(times), 3),
+            "max": round(max(times), 3),
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=None, help="calls per repeat, calibrated to --min-time by default")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds a repeat should take when calibrating")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--output", default=None, help="result file, defaults to benchmarks/results/micro-<timestamp>.json")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    names = [name for name in BENCHMARKS if args.filter is None or args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return
+
+    results: dict[str, Any] = {}
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory(prefix="mcp-bridge-micro-") as workdir:
+        load_bridge_config(workdir)
+        for name in names:
+            results[name] = measure(name, args, loop)
+            per_call = results[name]["per_call_us"]
+            print(f"{name:<36} {per_call['min']:>12.3f} us  (median {per_call['median']:.3f})", file=sys.stderr)
+    loop.close()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "benchmarks": results,
+    }
+
+    output = Path(args.output) if args.output else HERE / "results" / f"micro-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
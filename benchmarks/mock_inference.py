@@ -0,0 +1,149 @@
+"""
+Mock OpenAI compatible inference server for benchmarks.
+
+Answers /v1/chat/completions, streaming and non-streaming, at a fixed token rate. While
+the request offers tools and fewer than --tool-rounds tool results follow the last user
+message, it answers with tool calls instead, so every chat completion runs the same
+number of tool rounds through the bridge.
+
+    python benchmarks/mock_inference.py --port 9100 --tokens-per-second 200 --tool-rounds 1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--completion-tokens", type=int, default=64, help="tokens in a content answer")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="generation rate, 0 answers instantly")
+    parser.add_argument("--prefill-latency", type=float, default=0, help="seconds before the first token")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="tool call rounds per conversation")
+    parser.add_argument("--parallel-tool-calls", type=int, default=1, help="tool calls per round")
+    parser.add_argument("--tool-name", default="echo", help="tool to call, the first offered tool if it is missing")
+    parser.add_argument("--tool-arguments", default='{"text": "benchmark"}', help="JSON arguments of the tool calls")
+    return parser.parse_args()
+
+
+args = parse_args()
+app = FastAPI()
+
+
+def tool_rounds_done(messages: list[dict[str, Any]]) -> int:
+    """Assistant turns with tool calls since the last user message"""
+    rounds = 0
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            break
+        if message.get("role") == "assistant" and message.get("tool_calls"):
+            rounds += 1
+    return rounds
+
+
+def pick_tool(body: dict[str, Any]) -> str | None:
+    tools = body.get("tools") or []
+    if not tools or tool_rounds_done(body.get("messages", [])) >= args.tool_rounds:
+        return None
+
+    names = [tool["function"]["name"] for tool in tools]
+    return args.tool_name if args.tool_name in names else names[0]
+
+
+def tool_calls(tool_name: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": tool_name, "arguments": args.tool_arguments},
+        }
+        for _ in range(args.parallel_tool_calls)
+    ]
+
+
+async def generate_tokens() -> AsyncIterator[str]:
+    await asyncio.sleep(args.prefill_latency)
+    delay = 1 / args.tokens_per_second if args.tokens_per_second > 0 else 0
+    for index in range(args.completion_tokens):
+        if delay:
+            await asyncio.sleep(delay)
+        yield f"tok{index} "
+
+
+def completion(model: str, message: dict[str, Any], finish_reason: str) -> dict[str, Any]:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": args.completion_tokens, "total_tokens": args.completion_tokens + 1},
+    }
+
+
+def chunk(chunk_id: str, model: str, delta: dict[str, Any], finish_reason: str | None = None) -> str:
+    data = {
+        "id": chunk_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+    }
+    return f"data: {json.dumps(data)}\n\n"
+
+
+async def stream(model: str, tool_name: str | None) -> AsyncIterator[str]:
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+    yield chunk(chunk_id, model, {"role": "assistant", "content": ""})
+
+    if tool_name is not None:
+        await asyncio.sleep(args.prefill_latency)
+        for index, tool_call in enumerate(tool_calls(tool_name)):
+            arguments = tool_call["function"]["arguments"]
+            middle = len(arguments) // 2
+            # arguments arrive in fragments, like they do from real inference servers
+            yield chunk(chunk_id, model, {"tool_calls": [{"index": index, "id": tool_call["id"], "type": "function", "function": {"name": tool_name, "arguments": arguments[:middle]}}]})
+            yield chunk(chunk_id, model, {"tool_calls": [{"index": index, "function": {"arguments": arguments[middle:]}}]})
+        yield chunk(chunk_id, model, {}, "tool_calls")
+    else:
+        async for token in generate_tokens():
+            yield chunk(chunk_id, model, {"content": token})
+        yield chunk(chunk_id, model, {}, "stop")
+
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock")
+    tool_name = pick_tool(body)
+
+    if body.get("stream"):
+        return StreamingResponse(stream(model, tool_name), media_type="text/event-stream")
+
+    if tool_name is not None:
+        await asyncio.sleep(args.prefill_latency)
+        message = {"role": "assistant", "content": None, "tool_calls": tool_calls(tool_name)}
+        return completion(model, message, "tool_calls")
+
+    content = "".join([token async for token in generate_tokens()])
+    return completion(model, {"role": "assistant", "content": content}, "stop")
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model", "created": 0, "owned_by": "benchmarks"}]}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,77 @@
+"""
+Mock stdio MCP server for benchmarks.
+
+Serves an `echo` tool which answers after --latency seconds, plus --filler-tools tools
+with realistic schemas to grow the catalog the bridge converts and filters per request.
+
+    python benchmarks/mock_mcp_server.py --latency 0.05 --filler-tools 200
+"""
+
+import argparse
+import asyncio
+import json
+
+import mcp.types as types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0, help="seconds a tool call takes")
+    parser.add_argument("--filler-tools", type=int, default=0, help="extra tools advertised in the catalog")
+    return parser.parse_args()
+
+
+def filler_tool(index: int) -> types.Tool:
+    return types.Tool(
+        name=f"filler_{index}",
+        description=f"Filler tool {index} used to grow the benchmark catalog",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "What to look up"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+                "filters": {
+                    "type": "object",
+                    "properties": {"tags": {"type": "array", "items": {"type": "string"}}},
+                },
+            },
+            "required": ["query"],
+        },
+    )
+
+
+def build_server(latency: float, filler_tools: int) -> Server:
+    server = Server("benchmark")
+    tools = [
+        types.Tool(
+            name="echo",
+            description="Returns its arguments after a fixed latency",
+            inputSchema={"type": "object", "properties": {"text": {"type": "string"}}},
+        ),
+        *(filler_tool(index) for index in range(filler_tools)),
+    ]
+
+    @server.list_tools()
+    async def list_tools() -> list[types.Tool]:
+        return tools
+
+    @server.call_tool()
+    async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return [types.TextContent(type="text", text=json.dumps({"tool": name, "arguments": arguments}))]
+
+    return server
+
+
+async def main() -> None:
+    args = parse_args()
+    server = build_server(args.latency, args.filler_tools)
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,15 @@
 from mcp_bridge.config.env_subst import substitute_env_vars
 from mcp_bridge.config.initial import initial_settings
 from mcp_bridge.config.final import Settings
+from mcp_bridge.config.policy import AccessPolicy
 from typing import Any, Callable
 from loguru import logger
 from pydantic import ValidationError
 
-__all__ = ["config"]
+__all__ = ["config", "policy"]
 
 config: Settings = None  # type: ignore
+policy: AccessPolicy = None  # type: ignore
 
 if initial_settings.load_config:
     # import stuff needed to load the config
@@ -47,9 +49,12 @@ if initial_settings.load_config:
     except ValidationError as e:
         logger.error("unable to load a valid configuration")
         for error in e.errors():
-            logger.error(f"{error['loc'][0]}: {error['msg']}")
+            logger.error(f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}")
         exit(1)
 
+    # compile the model/tool access rules once
+    policy = AccessPolicy.compile(config)
+
     if config.logging.log_level != "DEBUG":
         logger.remove()
         logger.add(
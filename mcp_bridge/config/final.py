@@ -1,6 +1,6 @@
 from typing import Annotated, Literal, Union, Optional, List, Dict, Any
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from mcp.client.stdio import StdioServerParameters
 from mcpx.client.transports.docker import DockerMCPServer
@@ -14,6 +14,21 @@ class InferenceServer(BaseModel):
     api_key: str = Field(
         default="unauthenticated", description="API key for the inference server"
     )
+    timeout: float = Field(
+        default=10000, description="Read/write/pool timeout in seconds for inference requests"
+    )
+    connect_timeout: float = Field(
+        default=10, description="Connect timeout in seconds for the inference server"
+    )
+    max_connections: int = Field(
+        default=100, description="Maximum number of connections to the inference server"
+    )
+    max_keepalive_connections: int = Field(
+        default=20, description="Maximum number of idle keep-alive connections kept in the pool"
+    )
+    keepalive_expiry: float = Field(
+        default=30, description="Seconds an idle keep-alive connection is kept open"
+    )
 
 
 class Logging(BaseModel):
@@ -38,6 +53,145 @@ class Sampling(BaseModel):
     ] = []
 
 
+class Catalog(BaseModel):
+    ttl: float = Field(
+        default=300,
+        description="Seconds a cached tool catalog is trusted before it is refreshed, even without a list_changed notification",
+    )
+    snapshot_file: Optional[str] = Field(
+        default=None,
+        description="File the catalogs are persisted to, so tools are advertised right after a restart before the servers are up",
+    )
+
+
+class ToolCalls(BaseModel):
+    max_concurrency: int = Field(
+        default=16,
+        description="Maximum number of tool calls running at the same time across all requests",
+    )
+    max_concurrency_per_server: int = Field(
+        default=4,
+        description="Default maximum number of concurrent tool calls sent to a single MCP server",
+    )
+    speculative_execution: bool = Field(
+        default=False,
+        description="Start streamed tool calls as soon as their arguments are complete JSON and the next tool call begins, instead of waiting for the stream to finish",
+    )
+
+
+class Readiness(BaseModel):
+    required_servers: Optional[List[str]] = Field(
+        default=None,
+        description="Servers that must be up before /ready reports ready, defaults to every enabled eager server",
+    )
+
+
+class AgentLoop(BaseModel):
+    deadline: Optional[float] = Field(
+        default=None,
+        description="Seconds a chat completion may take across all inference and tool rounds, unlimited by default",
+    )
+    deadline_header: str = Field(
+        default="X-Request-Deadline",
+        description="Request header with a shorter deadline in seconds for a single request",
+    )
+    max_tool_rounds: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Maximum number of tool call rounds per chat completion, unlimited by default",
+    )
+
+
+class Tracing(BaseModel):
+    sample_rate: float = Field(
+        default=0,
+        ge=0,
+        le=1,
+        description="Fraction of chat completion requests that are traced, tracing is off by default",
+    )
+    buffer_size: int = Field(
+        default=100, ge=1, description="Number of finished traces kept in memory for export"
+    )
+    header: str = Field(
+        default="X-Trace-Id", description="Response header carrying the trace id of a traced request"
+    )
+
+
+class ToolCache(BaseModel):
+    ttl: float = Field(
+        default=0,
+        description="Default seconds a tool result of this server is cached, 0 disables caching",
+    )
+    max_size: int = Field(
+        default=256, description="Maximum number of cached tool results for this server"
+    )
+
+
+class ToolConfig(BaseModel):
+    cache_ttl: Optional[float] = Field(
+        default=None,
+        description="Seconds a result of this tool is cached, overrides tool_cache.ttl. Only set this for tools without side effects",
+    )
+    coalesce: bool = Field(
+        default=False,
+        description="Join identical concurrent calls of this tool onto one upstream call. Only set this for idempotent tools",
+    )
+
+
+class Replicas(BaseModel):
+    min: int = Field(default=1, ge=1, description="Number of sessions kept running")
+    max: int = Field(
+        default=1,
+        ge=1,
+        description="Upper bound of sessions started when every running session is saturated",
+    )
+    scale_down_after: float = Field(
+        default=60,
+        description="Seconds a session above min must be idle before it is stopped",
+    )
+    strategy: Literal["least_loaded", "round_robin"] = Field(
+        default="least_loaded",
+        description="How tool calls are spread over the sessions",
+    )
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.min > self.max:
+            raise ValueError(f"replicas.min ({self.min}) is larger than replicas.max ({self.max})")
+        return self
+
+
+class Restart(BaseModel):
+    initial_backoff: float = Field(
+        default=0.5, description="Seconds before the first restart of a failed session"
+    )
+    max_backoff: float = Field(
+        default=60, description="Upper bound of the seconds between restarts"
+    )
+    multiplier: float = Field(
+        default=2, description="Factor the backoff grows by with each failure in a row"
+    )
+    jitter: float = Field(
+        default=0.2,
+        ge=0,
+        le=1,
+        description="Fraction the backoff is randomly varied by, so servers do not restart in lockstep",
+    )
+    failure_threshold: int = Field(
+        default=5,
+        description="Failures in a row that open the circuit, tool calls fail fast and the tools are hidden while it is open",
+    )
+    reset_timeout: float = Field(
+        default=60,
+        description="Seconds the circuit stays open before the next start attempt",
+    )
+    healthy_after: float = Field(
+        default=10,
+        ge=0,
+        description="Seconds a session must stay up before the failures in a row are reset, so a server crashing right after it starts keeps backing off",
+    )
+
+
 class SSEMCPServer(BaseModel):
     # TODO: expand this once I find a good definition for this
     url: str = Field(description="URL of the MCP server")
@@ -69,6 +223,79 @@ class MCPServerConfig(BaseModel):
         default=False, description="Whether this server is disabled"
     )
 
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        description="Maximum number of concurrent tool calls sent to each session of this server, overrides tool_calls.max_concurrency_per_server",
+    )
+
+    lifecycle: Literal["eager", "lazy"] = Field(
+        default="eager",
+        description="eager servers run from boot until shutdown, lazy servers are started on their first call and stopped when idle",
+    )
+
+    idle_timeout: float = Field(
+        default=300, description="Seconds a lazy server must be idle before it is stopped"
+    )
+
+    start_timeout: float = Field(
+        default=30,
+        description="Seconds a call waits for a lazy or still booting server to start",
+    )
+
+    ping_interval: float = Field(
+        default=10,
+        gt=0,
+        description="Seconds without a successful request after which a session is pinged",
+    )
+
+    ping_timeout: float = Field(
+        default=10,
+        gt=0,
+        description="Seconds a ping may take before the session is considered broken",
+    )
+
+    warm_standby: int = Field(
+        default=0,
+        ge=0,
+        description="Docker servers only: containers kept started ahead of time, so a failed session is replaced without waiting for a container start",
+    )
+
+    restart: Restart = Field(
+        default_factory=Restart,
+        description="Backoff and circuit breaker for restarting failed sessions",
+    )
+
+    replicas: Replicas = Field(
+        default_factory=Replicas,
+        description="Number of sessions of this server, calls are spread over them by replicas.strategy",
+    )
+
+    tool_cache: ToolCache = Field(
+        default_factory=ToolCache, description="Tool result cache for this server"
+    )
+
+    tools: Dict[str, ToolConfig] = Field(
+        default_factory=dict, description="Per tool settings, keyed by tool name"
+    )
+
+    @model_validator(mode="after")
+    def check_access_conflicts(self):
+        if self.allowed_models is not None and self.disallowed_models is not None:
+            common_models = set(self.allowed_models) & set(self.disallowed_models)
+            if common_models:
+                raise ValueError(
+                    f"models {sorted(common_models)} appear in both allowed_models and disallowed_models"
+                )
+
+        if self.allowed_tools is not None and self.disallowed_tools is not None:
+            common_tools = set(self.allowed_tools) & set(self.disallowed_tools)
+            if common_tools:
+                raise ValueError(
+                    f"tools {sorted(common_tools)} appear in both allowed_tools and disallowed_tools"
+                )
+
+        return self
+
 
 MCPServer = Annotated[
     Union[StdioServerParameters, SSEMCPServer, DockerMCPServer],
@@ -126,6 +353,31 @@ class Settings(BaseSettings):
         description="sampling config",
     )
 
+    tool_calls: ToolCalls = Field(
+        default_factory=lambda: ToolCalls.model_construct(),
+        description="tool call execution config",
+    )
+
+    agent_loop: AgentLoop = Field(
+        default_factory=lambda: AgentLoop.model_construct(),
+        description="chat completion loop limits",
+    )
+
+    tracing: Tracing = Field(
+        default_factory=lambda: Tracing.model_construct(),
+        description="request tracing config",
+    )
+
+    catalog: Catalog = Field(
+        default_factory=lambda: Catalog.model_construct(),
+        description="tool catalog cache config",
+    )
+
+    readiness: Readiness = Field(
+        default_factory=lambda: Readiness.model_construct(),
+        description="readiness check config",
+    )
+
     logging: Logging = Field(
         default_factory=lambda: Logging.model_construct(),
         description="logging config",
@@ -0,0 +1,79 @@
+from typing import Optional
+from mcp_bridge.config.final import MCPServerConfig, Settings
+
+__all__ = ["AccessPolicy", "ServerPolicy"]
+
+# model names come from requests, so the memo must not grow without bound
+MAX_MEMOIZED_MODELS = 256
+
+
+class ServerPolicy:
+    """Model and tool access rules of a single MCP server, compiled to sets"""
+
+    __slots__ = ("allowed_models", "disallowed_models", "allowed_tools", "disallowed_tools")
+
+    def __init__(self, server_config: MCPServerConfig) -> None:
+        self.allowed_models = _to_set(server_config.allowed_models)
+        self.disallowed_models = _to_set(server_config.disallowed_models) or frozenset()
+        self.allowed_tools = _to_set(server_config.allowed_tools)
+        self.disallowed_tools = _to_set(server_config.disallowed_tools) or frozenset()
+
+    def allows_model(self, model_name: str) -> bool:
+        if self.allowed_models is not None and model_name not in self.allowed_models:
+            return False
+        return model_name not in self.disallowed_models
+
+    def allows_tool(self, tool_name: str) -> bool:
+        if self.allowed_tools is not None and tool_name not in self.allowed_tools:
+            return False
+        return tool_name not in self.disallowed_tools
+
+
+class AccessPolicy:
+    """
+    Access rules of every configured MCP server, compiled once when the config is loaded.
+
+    Conflicting allowed/disallowed entries are rejected by `MCPServerConfig` validation,
+    so the checks here are plain set lookups.
+    """
+
+    def __init__(self, servers: dict[str, ServerPolicy]) -> None:
+        self.servers = servers
+        self._servers_for_model: dict[str, tuple[str, ...]] = {}
+
+    @classmethod
+    def compile(cls, settings: Settings) -> "AccessPolicy":
+        return cls(
+            {
+                name: ServerPolicy(server_config)
+                for name, server_config in settings.mcp_servers.items()
+                if not server_config.disabled
+            }
+        )
+
+    def servers_for_model(self, model_name: str) -> tuple[str, ...]:
+        """Names of the servers the model may use, in config order"""
+        servers = self._servers_for_model.get(model_name)
+        if servers is None:
+            servers = tuple(
+                name
+                for name, server in self.servers.items()
+                if server.allows_model(model_name)
+            )
+            if len(self._servers_for_model) >= MAX_MEMOIZED_MODELS:
+                self._servers_for_model.clear()
+            self._servers_for_model[model_name] = servers
+
+        return servers
+
+    def allows_model(self, server_name: str, model_name: str) -> bool:
+        server = self.servers.get(server_name)
+        return server is not None and server.allows_model(model_name)
+
+    def allows_tool(self, server_name: str, tool_name: str) -> bool:
+        server = self.servers.get(server_name)
+        return server is not None and server.allows_tool(tool_name)
+
+
+def _to_set(values: Optional[list[str]]) -> Optional[frozenset[str]]:
+    return frozenset(values) if values is not None else None
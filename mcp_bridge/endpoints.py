@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 
 from lmos_openai_types import CreateChatCompletionRequest, CreateCompletionRequest
 
 from mcp_bridge.openai_clients import (
     get_client,
+    get_headers,
     completions,
     chat_completions,
     streaming_chat_completions,
+    run_until_disconnected,
 )
 
+from mcp_bridge.config import config
 from mcp_bridge.openapi_tags import Tag
+from mcp_bridge.tracing import tracer
 
 router = APIRouter(prefix="/v1", tags=[Tag.openai])
 
@@ -29,18 +33,34 @@ async def openai_completions(
 @router.post("/chat/completions")
 async def openai_chat_completions(
     request: CreateChatCompletionRequest, 
-    http_request: Request
+    http_request: Request,
+    response: Response,
 ):
     """Chat Completions endpoint"""
+    trace = tracer.start_trace(
+        "chat.completions", model=request.model, stream=bool(request.stream)
+    )
     if request.stream:
-        return await streaming_chat_completions(request, http_request)
+        # the stream ends the trace once it is done
+        stream = await streaming_chat_completions(request, http_request)
+        if trace is not None and stream is not None:
+            stream.headers[config.tracing.header] = trace.trace_id
+        return stream
     else:
-        return await chat_completions(request, http_request)
+        try:
+            result = await run_until_disconnected(
+                http_request, chat_completions(request, http_request)
+            )
+        finally:
+            tracer.end_trace(trace)
+
+        if trace is not None:
+            response.headers[config.tracing.header] = trace.trace_id
+        return result
 
 
 @router.get("/models")
 async def models(request: Request):
     """List models"""
-    async with get_client(request) as client:
-        response = await client.get("/models")
+    response = await get_client().get("/models", headers=get_headers(request))
     return response.json()
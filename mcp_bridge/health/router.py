@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-from .types import HealthCheckResponse
+from .types import HealthCheckResponse, ReadinessResponse
 from .manager import manager
 from mcp_bridge.openapi_tags import Tag
 
@@ -27,3 +27,18 @@ async def health():
         unhealthy_events=[],
     )
     return response
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready():
+    """Readiness check endpoint, ready once the required MCP servers are up"""
+    # imported here, the client manager itself reports to the health manager
+    from mcp_bridge.mcp_clients.McpClientManager import ClientManager
+
+    servers = ClientManager.readiness()
+
+    if not all(servers.values()):
+        response = ReadinessResponse(status="not_ready", servers=servers)
+        return JSONResponse(content=response.model_dump(), status_code=503)
+
+    return ReadinessResponse(status="ready", servers=servers)
@@ -17,6 +17,15 @@ class UnhealthyEvent(BaseModel):
     )
 
 
+class ReadinessResponse(BaseModel):
+    """Represents a readiness check response"""
+
+    status: Literal["ready", "not_ready"] = Field(..., description="Readiness status")
+    servers: dict[str, bool] = Field(
+        default_factory=dict, description="Whether each required MCP server is up"
+    )
+
+
 class HealthCheckResponse(BaseModel):
     """Represents a health check response"""
 
@@ -1,5 +1,6 @@
 from contextlib import asynccontextmanager
 from mcp_bridge.mcp_clients.McpClientManager import ClientManager
+from mcp_bridge.openai_clients.genericHttpxClient import start_client, close_client
 from loguru import logger
 
 
@@ -9,6 +10,8 @@ async def lifespan(app):
 
     # startup
     logger.log("DEBUG", "Entered fastapi lifespan")
+    await start_client()
+    logger.log("DEBUG", "Created inference server client")
     await ClientManager.initialize()
     logger.log("DEBUG", "Initialized MCP Client Manager")
 
@@ -17,5 +20,9 @@ async def lifespan(app):
     logger.log("DEBUG", "Returned form lifespan yield")
 
     # shutdown
+    await ClientManager.shutdown()
+    logger.log("DEBUG", "Closed MCP clients")
+    await close_client()
+    logger.log("DEBUG", "Closed inference server client")
 
     logger.log("DEBUG", "Exiting fastapi lifespan")
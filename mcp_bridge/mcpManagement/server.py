@@ -25,7 +25,7 @@ async def get_server_tools(server_name: str) -> ListToolsResult:
     if not client:
         raise HTTPException(status_code=404, detail=f"Server '{server_name}' not found")
 
-    return await client.list_tools()
+    return ListToolsResult(tools=await ClientManager.get_tools(server_name))
 
 
 @router.get("/{server_name}/resources")
@@ -47,4 +47,7 @@ async def get_server_status(server_name: str) -> McpServerStatus:
     if not client:
         raise HTTPException(status_code=404, detail=f"Server '{server_name}' not found")
 
-    return await client.status()
+    status = await client.status()
+    catalog = ClientManager.catalogs.get(server_name)
+    status.catalog_stale = catalog is not None and catalog.stale
+    return status
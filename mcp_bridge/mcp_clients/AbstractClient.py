@@ -1,6 +1,10 @@
 import asyncio
+import itertools
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, AsyncContextManager, Awaitable, Callable, Optional
+import anyio
 from fastapi import HTTPException
 from mcp import McpError
 from mcp.types import (
@@ -15,7 +19,15 @@ from mcp.types import (
 )
 from loguru import logger
 from pydantic import AnyUrl
+from mcp_bridge.config import config
+from mcp_bridge.config.final import Replicas, Restart
+from mcp_bridge.health import manager as health_manager, UnhealthyEvent
+from mcp_bridge.metrics import instruments as metrics
+from mcp_bridge.mcp_clients.CircuitBreaker import CircuitBreaker
+from mcp_bridge.mcp_clients.Replica import Replica
 from mcp_bridge.mcp_clients.session import McpClientSession
+from mcp_bridge.mcp_clients.SingleFlight import SingleFlight
+from mcp_bridge.mcp_clients.ToolResultCache import ToolResultCache, tool_call_key
 from mcp_bridge.models.mcpServerStatus import McpServerStatus
 
 
@@ -24,61 +36,409 @@ class GenericMcpClient(ABC):
     config: Any
     client: Any
     session: McpClientSession | None = None
+    on_catalog_changed: Callable[[str], Awaitable[Any]] | None = None
 
     def __init__(self, name: str) -> None:
         super().__init__()
         self.session = None
+        self.ready = asyncio.Event()  # set while a session is available
         self.name = name
 
+        self.server_config = config.mcp_servers.get(name)
+        self.max_concurrency = config.tool_calls.max_concurrency_per_server
+        self.ping_interval = 10.0
+        self.ping_timeout = 10.0
+        self.replica_config = Replicas()
+        self.restart_config = Restart()
+        self.lazy = False
+        cache_size = 0
+        if self.server_config is not None:
+            if self.server_config.max_concurrency is not None:
+                self.max_concurrency = self.server_config.max_concurrency
+            self.replica_config = self.server_config.replicas
+            self.ping_interval = self.server_config.ping_interval
+            self.ping_timeout = self.server_config.ping_timeout
+            self.restart_config = self.server_config.restart
+            self.lazy = self.server_config.lifecycle == "lazy"
+            cache_size = self.server_config.tool_cache.max_size
+        self.replicas: list[Replica] = []
+        self._next_replica_index = 0
+        self._round_robin = itertools.count()
+        self.last_used = time.monotonic()
+        self.booting = True  # no session has been ready yet
+        self.tool_cache = ToolResultCache(cache_size)
+        self.breaker = CircuitBreaker(
+            self.restart_config.failure_threshold, self.restart_config.reset_timeout
+        )
+        self.in_flight: SingleFlight[CallToolResult] = SingleFlight()
+
         logger.debug(f"initializing client class for {name}")
 
     @abstractmethod
-    async def _maintain_session(self):
+    def _transport(self) -> AsyncContextManager:
+        """Context manager yielding the read and write streams of a new connection"""
         pass
 
-    async def _session_maintainer(self):
+    async def _maintain_session(self, replica: Replica):
+        logger.debug(f"starting maintain session for {self.name}")
+        async with self._transport() as client:
+            logger.debug(f"entered transport context manager for {self.name}")
+            read_stream, write_stream = client[0], client[1]
+            assert read_stream is not None, f"missing read stream for {self.name}"
+            assert write_stream is not None, f"missing write stream for {self.name}"
+            async with McpClientSession(
+                read_stream, write_stream, on_list_changed=self._catalog_changed
+            ) as session:
+                await session.initialize()
+                logger.debug(f"finished initialise session for {self.name}")
+                await self._session_ready(session, replica)
+
+                try:
+                    await self._keepalive(session, replica)
+                except Exception as exc:
+                    logger.error(f"session of {self.name} broke: {exc}")
+                    self._session_lost(replica)
+
+        logger.debug(f"exiting session for {self.name}")
+
+    async def _keepalive(self, session: McpClientSession, replica: Replica):
+        """Ping the session whenever it went ping_interval seconds without a successful request"""
+        healthy_at = time.monotonic() + self.restart_config.healthy_after
+        healthy = False
+        while not replica.evicted.is_set():
+            now = time.monotonic()
+            if not healthy and now >= healthy_at:
+                healthy = True
+                self._session_healthy()
+
+            quiet_for = now - session.last_response_at
+            if quiet_for < self.ping_interval:
+                wait = self.ping_interval - quiet_for
+                if not healthy:
+                    wait = min(wait, healthy_at - now)
+                try:
+                    async with asyncio.timeout(wait):
+                        await replica.evicted.wait()
+                except TimeoutError:
+                    pass
+                continue
+
+            started = time.monotonic()
+            async with asyncio.timeout(self.ping_timeout):
+                await session.send_ping()
+            replica.ping_rtt = time.monotonic() - started
+            metrics.session_ping_rtt.set(self.name, value=replica.ping_rtt)
+
+            if config.logging.log_server_pings:
+                logger.debug(f"pinged session for {self.name} in {replica.ping_rtt * 1000:.1f}ms")
+
+        raise ConnectionError(f"replica {replica.index} was evicted")
+
+    async def _session_maintainer(self, replica: Replica):
         while True:
             try:
-                await self._maintain_session()
+                await self._maintain_session(replica)
             except FileNotFoundError as e:
                 logger.error(f"failed to maintain session for {self.name}: file {e.filename} not found.")
             except Exception as e:
                 logger.error(f"failed to maintain session for {self.name}: {type(e)} {e.args}")
+            finally:
+                self._session_lost(replica)
+
+            delay = self._restart_delay()
+            logger.debug(f"restarting session for {self.name} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _restart_delay(self) -> float:
+        """Record a session failure and return how long to wait before the next start"""
+        restart = self.restart_config
+        metrics.session_restarts.inc(self.name)
+        if self.breaker.record_failure():
+            message = f"{self.name} failed {self.breaker.failures} times in a row, circuit open for {restart.reset_timeout}s"
+            logger.error(message)
+            health_manager.add_unhealthy_event(
+                UnhealthyEvent(name=f"circuit open: {message}", severity="warning")
+            )
+
+        # the exponent is capped, a server failing for days would overflow the float
+        delay = restart.initial_backoff * restart.multiplier ** min(self.breaker.failures - 1, 32)
+        delay = min(delay, restart.max_backoff)
+        delay *= 1 + random.uniform(-restart.jitter, restart.jitter)
+        return max(delay, self.breaker.retry_in())
+
+    async def start(self, start_sessions: bool = True):
+        # lazy servers without a snapshot start once at boot so their catalog is known,
+        # the idle watcher stops them again
+        if start_sessions or not self.lazy:
+            self._start_replicas()
+
+        if self.replica_config.max > self.replica_config.min:
+            asyncio.create_task(self._autoscaler())
+
+        if self.lazy:
+            asyncio.create_task(self._idle_watcher())
+
+    async def close(self):
+        """Close every session of this server"""
+        for replica in list(self.replicas):
+            await self._stop_replica(replica)
+
+    def _start_replicas(self):
+        for _ in range(self.replica_config.min):
+            self._add_replica()
+
+    def _add_replica(self) -> Replica:
+        replica = Replica(self._next_replica_index, self.max_concurrency)
+        self._next_replica_index += 1
+        replica.task = asyncio.create_task(self._session_maintainer(replica))
+        self.replicas.append(replica)
+        return replica
+
+    async def _stop_replica(self, replica: Replica):
+        self.replicas.remove(replica)
+        # before awaiting the task, so calls arriving meanwhile do not pick the stopping session
+        self._session_lost(replica)
+        if replica.task is not None:
+            replica.task.cancel()
+            try:
+                await replica.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _autoscaler(self):
+        """Stop replicas above the minimum once they have been idle for long enough"""
+        scale_down_after = self.replica_config.scale_down_after
+        while True:
+            await asyncio.sleep(max(scale_down_after / 2, 1))
+
+            # newest first, so the long lived replicas are the ones that stay
+            for replica in reversed(self.replicas[self.replica_config.min :]):
+                if replica.ready and replica.is_idle(scale_down_after):
+                    logger.debug(f"stopping idle replica {replica.index} of {self.name}")
+                    await self._stop_replica(replica)
+
+    async def _idle_watcher(self):
+        """Stop every replica of a lazy server once none of them has been used for idle_timeout"""
+        idle_timeout = self.server_config.idle_timeout
+        while True:
+            await asyncio.sleep(max(idle_timeout / 4, 1))
+
+            if not self.replicas or self.session is None:
+                continue
+            if time.monotonic() - self.last_used <= idle_timeout:
+                continue
+            if not all(replica.is_idle(idle_timeout) for replica in self.replicas):
+                continue
+
+            logger.info(f"stopping idle lazy server {self.name}")
+            for replica in list(self.replicas):
+                await self._stop_replica(replica)
+
+    def is_available(self) -> bool:
+        """Whether calls can be sent to this server, lazy servers are started on demand"""
+        if self.breaker.state == "open":
+            return False
+        return self.session is not None or self.lazy or self.booting
+
+    async def _pick_replica(self) -> Replica:
+        """A ready replica chosen by the configured strategy, scaling up if all are saturated"""
+        ready = [replica for replica in self.replicas if replica.ready]
+        while not ready:
+            # the sessions went away after the caller waited for one, start or wait for a new one
+            logger.debug(f"no ready replica of {self.name}, waiting for a session")
+            self._set_session(None)
+            await self._wait_for_session()
+            ready = [replica for replica in self.replicas if replica.ready]
+
+        least_loaded = min(ready, key=lambda replica: replica.in_flight)
+        if self.replica_config.strategy == "round_robin":
+            replica = ready[next(self._round_robin) % len(ready)]
+        else:
+            replica = least_loaded
+
+        if (
+            least_loaded.in_flight >= self.max_concurrency
+            and len(self.replicas) < self.replica_config.max
+        ):
+            # the new replica takes calls once it is ready, this call queues on the current one
+            logger.debug(f"replicas of {self.name} are saturated, starting another one")
+            self._add_replica()
+
+        return replica
+
+    async def _session_ready(self, session: McpClientSession, replica: Replica):
+        """Called by implementations once a session has been initialized"""
+        replica.session = session
+        replica.evicted.clear()
+        self.booting = False
+        first = self.session is None
+        self._set_session(self.session or session)
+        if first:
+            await self._catalog_changed()
+
+    def _session_healthy(self):
+        """Called once a session stayed up for restart.healthy_after seconds"""
+        if self.breaker.state != "closed":
+            logger.info(f"{self.name} recovered, circuit closed")
+        self.breaker.record_success()
+
+    def _session_lost(self, replica: Replica):
+        """Called by implementations when a session stops responding"""
+        session = replica.session
+        replica.session = None
+        if session is not None and self.session is session:
+            self._set_session(
+                next((other.session for other in self.replicas if other.ready), None)
+            )
+
+    def _evict(self, replica: Replica, reason: BaseException):
+        """Stop routing to a broken replica, its maintainer replaces the session in the background"""
+        if replica.session is None:
+            return
+
+        logger.warning(f"evicting replica {replica.index} of {self.name}: {reason!r}")
+        self._session_lost(replica)
+        replica.evicted.set()
 
-            logger.debug(f"restarting session for {self.name}")
-            await asyncio.sleep(0.5)
+    def _set_session(self, session: McpClientSession | None):
+        self.session = session
+        if session is None:
+            self.ready.clear()
+        else:
+            self.ready.set()
 
-    async def start(self):
-        asyncio.create_task(self._session_maintainer())
+    async def _catalog_changed(self):
+        """Let the manager know that the catalog of this server needs refreshing"""
+        if self.on_catalog_changed is not None:
+            await self.on_catalog_changed(self.name)
+
+    def _cache_ttl(self, name: str) -> float:
+        """Seconds results of a tool may be cached, 0 if they must not be"""
+        if self.server_config is None:
+            return 0
+
+        tool_config = self.server_config.tools.get(name)
+        if tool_config is not None and tool_config.cache_ttl is not None:
+            return tool_config.cache_ttl
+
+        return self.server_config.tool_cache.ttl
+
+    def _coalesces(self, name: str) -> bool:
+        """Whether identical concurrent calls of a tool may share one upstream call"""
+        if self.server_config is None:
+            return False
+
+        tool_config = self.server_config.tools.get(name)
+        return tool_config is not None and tool_config.coalesce
 
     async def call_tool(
-        self, name: str, arguments: dict, timeout: Optional[int] = None
+        self, name: str, arguments: dict, timeout: Optional[float] = None
+    ) -> CallToolResult:
+        if self.breaker.state == "open":
+            logger.warning(f"not calling {name}, circuit of {self.name} is open")
+            metrics.tool_call_errors.inc(self.name, name)
+            return CallToolResult(
+                content=[
+                    TextContent(
+                        type="text",
+                        text=f"MCP server \"{self.name}\" is unavailable, retry in {self.breaker.retry_in():.0f}s",
+                    )
+                ],
+                isError=True,
+            )
+
+        cache_ttl = self._cache_ttl(name)
+        coalesce = self._coalesces(name)
+        # only set when the result may be cached
+        cache_key: Optional[str] = None
+
+        if cache_ttl > 0:
+            cache_key = tool_call_key(name, arguments)
+            cached = self.tool_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"tool result cache hit for {name} on {self.name}")
+                return cached
+
+        if coalesce:
+            key = cache_key if cache_key is not None else tool_call_key(name, arguments)
+            try:
+                return await self.in_flight.do(
+                    key,
+                    lambda: self._call_tool(name, arguments, timeout, cache_key, cache_ttl),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                # a joined caller may have a shorter timeout than the call it joined
+                return self._timed_out(name)
+
+        return await self._call_tool(name, arguments, timeout, cache_key, cache_ttl)
+
+    async def _call_tool(
+        self,
+        name: str,
+        arguments: dict,
+        timeout: Optional[float],
+        cache_key: Optional[str],
+        cache_ttl: float,
     ) -> CallToolResult:
         await self._wait_for_session()
+        replica = await self._pick_replica()
+        replica.in_flight += 1
+        metrics.tool_calls_in_flight.inc(self.name)
+        started = time.monotonic()
 
         try:
             async with asyncio.timeout(timeout):
-                return await self.session.call_tool(
-                    name=name,
-                    arguments=arguments,
-                )
+                async with replica.semaphore:
+                    session = replica.session or self.session
+                    assert session is not None, "Session is None"
+                    result = await session.call_tool(
+                        name=name,
+                        arguments=arguments,
+                    )
 
         except asyncio.TimeoutError:
-            logger.error(f"timed out calling tool: {name}")
-            return CallToolResult(
-                content=[
-                    TextContent(type="text", text=f"Timeout Error calling {name}")
-                ],
-                isError=True,
-            )
+            return self._timed_out(name)
 
         except McpError as e:
             logger.error(f"error calling {name}: {e}")
+            metrics.tool_call_errors.inc(self.name, name)
             return CallToolResult(
                 content=[TextContent(type="text", text=f"Error calling {name}: {e}")],
                 isError=True,
             )
 
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+            self._evict(replica, e)
+            metrics.tool_call_errors.inc(self.name, name)
+            return CallToolResult(
+                content=[
+                    TextContent(type="text", text=f"Connection to {self.name} lost calling {name}")
+                ],
+                isError=True,
+            )
+
+        finally:
+            replica.in_flight -= 1
+            replica.last_used = time.monotonic()
+            metrics.tool_calls_in_flight.dec(self.name)
+            metrics.tool_call_duration.observe(self.name, name, value=replica.last_used - started)
+
+        if result.isError:
+            metrics.tool_call_errors.inc(self.name, name)
+        elif cache_key is not None:
+            self.tool_cache.put(cache_key, result, cache_ttl)
+
+        return result
+
+    def _timed_out(self, name: str) -> CallToolResult:
+        logger.error(f"timed out calling tool: {name}")
+        metrics.tool_call_timeouts.inc(self.name, name)
+        return CallToolResult(
+            content=[TextContent(type="text", text=f"Timeout Error calling {name}")],
+            isError=True,
+        )
+
     async def get_prompt(
         self, prompt: str, arguments: dict[str, str]
     ) -> GetPromptResult | None:
@@ -129,12 +489,27 @@ class GenericMcpClient(ABC):
             logger.error(f"error listing prompts: {e}")
             return ListPromptsResult(prompts=[])
 
-    async def _wait_for_session(self, timeout: int = 5, http_error: bool = True):
+    async def _wait_for_session(self, timeout: float = 5, http_error: bool = True):
+        self.last_used = time.monotonic()
+
+        if self.breaker.state == "open":
+            detail = f"MCP server \"{self.name}\" is unavailable, retry in {self.breaker.retry_in():.0f}s"
+            if http_error:
+                raise HTTPException(status_code=503, detail=detail)
+            raise TimeoutError(detail)
+
+        if self.session is None and (self.lazy or self.booting):
+            if not self.replicas:
+                logger.info(f"starting lazy server {self.name} on demand")
+                self._start_replicas()
+            if self.server_config is not None:
+                timeout = max(timeout, self.server_config.start_timeout)
+
         try:
             async with asyncio.timeout(timeout):
                 while self.session is None:
-                    await asyncio.sleep(1)
                     logger.debug(f"waiting for session for {self.name}")
+                    await self.ready.wait()
 
         except asyncio.TimeoutError:
             if http_error:
@@ -148,6 +523,19 @@ class GenericMcpClient(ABC):
 
     async def status(self) -> McpServerStatus:
         """Get the status of the MCP server"""
+        ping_rtts = [
+            replica.ping_rtt
+            for replica in self.replicas
+            if replica.ready and replica.ping_rtt is not None
+        ]
         return McpServerStatus(
-            name=self.name, online=self.session is not None, enabled=True
+            name=self.name,
+            online=self.session is not None,
+            enabled=True,
+            replicas=sum(replica.ready for replica in self.replicas),
+            ping_rtt_ms=max(ping_rtts) * 1000 if ping_rtts else None,
+            circuit=self.breaker.state,
+            tool_cache_hits=self.tool_cache.hits,
+            tool_cache_misses=self.tool_cache.misses,
+            tool_cache_size=len(self.tool_cache),
         )
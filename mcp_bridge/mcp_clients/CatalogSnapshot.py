@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from loguru import logger
+from pydantic import ValidationError
+from mcp_bridge.config.final import MCPServerConfig
+from mcp_bridge.models.serverCatalog import ServerCatalog
+
+SNAPSHOT_VERSION = 1
+
+_write_lock = asyncio.Lock()
+
+
+def config_hash(server_config: MCPServerConfig) -> str:
+    """Hash of the parts of a server config that decide what the server offers"""
+    return hashlib.sha256(
+        server_config.server.model_dump_json().encode("utf-8")
+    ).hexdigest()
+
+
+def load_snapshot(
+    path: str, server_configs: dict[str, MCPServerConfig]
+) -> dict[str, ServerCatalog]:
+    """
+    Load the persisted catalogs of the given servers, marked stale.
+
+    Entries whose server config changed since they were written are skipped, as is the
+    whole file when it cannot be read.
+    """
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"ignoring unreadable catalog snapshot {path}: {e}")
+        return {}
+
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"ignoring catalog snapshot {path} with unknown version")
+        return {}
+
+    catalogs = {}
+    for name, entry in data.get("servers", {}).items():
+        server_config = server_configs.get(name)
+        if server_config is None or entry.get("config_hash") != config_hash(server_config):
+            continue
+
+        try:
+            catalog = ServerCatalog.model_validate(entry["catalog"])
+        except (KeyError, ValidationError) as e:
+            logger.warning(f"ignoring catalog snapshot entry for {name}: {e}")
+            continue
+
+        # monotonic time does not survive a restart
+        catalog.fetched_at = time.monotonic()
+        catalog.stale = True
+        catalogs[name] = catalog
+
+    return catalogs
+
+
+async def save_snapshot(
+    path: str,
+    catalogs: dict[str, ServerCatalog],
+    server_configs: dict[str, MCPServerConfig],
+):
+    """Persist the catalogs, replacing the snapshot file atomically"""
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "servers": {
+            name: {
+                "config_hash": config_hash(server_configs[name]),
+                "catalog": catalog.model_dump(
+                    mode="json", exclude={"fetched_at", "stale"}
+                ),
+            }
+            for name, catalog in catalogs.items()
+            if name in server_configs
+        },
+    }
+
+    async with _write_lock:
+        try:
+            await asyncio.to_thread(_write_file, path, json.dumps(data))
+        except OSError as e:
+            logger.warning(f"failed to write catalog snapshot {path}: {e}")
+
+
+def _write_file(path: str, content: str):
+    tmp_path = f"{path}.tmp"
+    Path(tmp_path).write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
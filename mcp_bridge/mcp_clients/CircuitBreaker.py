@@ -0,0 +1,49 @@
+import time
+from typing import Literal
+
+circuit_state = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive session failures of a server.
+
+    The circuit opens after `failure_threshold` failures in a row. Once `reset_timeout`
+    has passed it is half open and the next attempt decides: a success closes it, a
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._open = False
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> circuit_state:
+        if not self._open:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._open = False
+
+    def record_failure(self) -> bool:
+        """Count a failure, returns whether this opened the circuit"""
+        half_open = self.state == "half_open"
+        self.failures += 1
+        if half_open or (not self._open and self.failures >= self.failure_threshold):
+            self._open = True
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit is half open, 0 unless it is open"""
+        if self.state != "open":
+            return 0
+        return self.reset_timeout - (time.monotonic() - self._opened_at)
@@ -1,10 +1,6 @@
-import asyncio
-
-from mcp_bridge.mcp_clients.session import McpClientSession
-from mcp_bridge.config import config
-from mcpx.client.transports.docker import docker_client, DockerMCPServer
+from mcpx.client.transports.docker import DockerMCPServer
 from .AbstractClient import GenericMcpClient
-from loguru import logger
+from .DockerPool import ContainerPool, pooled_docker_client
 
 
 class DockerClient(GenericMcpClient):
@@ -14,25 +10,17 @@ class DockerClient(GenericMcpClient):
         super().__init__(name=name)
 
         self.config = config
+        standby = self.server_config.warm_standby if self.server_config is not None else 0
+        self.pool = ContainerPool(name, config, standby)
 
-    async def _maintain_session(self):
-        async with docker_client(self.config) as client:
-            logger.debug(f"made instance of docker client for {self.name}")
-            async with McpClientSession(*client) as session:
-                await session.initialize()
-                logger.debug(f"finished initialise session for {self.name}")
-                self.session = session
-
-                try:
-                    while True:
-                        await asyncio.sleep(10)
-                        if config.logging.log_server_pings:
-                            logger.debug(f"pinging session for {self.name}")
-
-                        await session.send_ping()
+    async def start(self, start_sessions: bool = True):
+        # pulls the image in parallel with the other servers starting up
+        await self.pool.start()
+        await super().start(start_sessions)
 
-                except Exception as exc:
-                    logger.error(f"ping failed for {self.name}: {exc}")
-                    self.session = None
+    async def close(self):
+        await super().close()
+        await self.pool.close()
 
-        logger.debug(f"exiting session for {self.name}")
+    def _transport(self):
+        return pooled_docker_client(self.pool)
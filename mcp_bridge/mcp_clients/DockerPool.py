@@ -0,0 +1,194 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+import anyio
+import anyio.lowlevel
+from aiodocker import Docker, DockerError
+from aiodocker.containers import DockerContainer
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from loguru import logger
+from mcp import types
+from mcpx.client.transports.docker import DockerMCPServer
+
+
+class ContainerPool:
+    """
+    Starts the containers of a Docker MCP server and keeps `standby` of them started
+    ahead of time, so a new session does not wait for an image pull or container start.
+    """
+
+    def __init__(self, name: str, server: DockerMCPServer, standby: int) -> None:
+        self.name = name
+        self.server = server
+        self.standby = standby
+        self._docker: Optional[Docker] = None
+        self._image_present = False
+        self._image_lock = asyncio.Lock()
+        self._containers: list[DockerContainer] = []
+        self._refill_task: Optional[asyncio.Task] = None
+
+    @property
+    def docker(self) -> Docker:
+        # created on first use, aiodocker needs a running event loop
+        if self._docker is None:
+            self._docker = Docker()
+        return self._docker
+
+    async def start(self):
+        """Pull the image and start the standby containers in the background"""
+        asyncio.create_task(self._prepare())
+
+    async def _prepare(self):
+        try:
+            await self._ensure_image()
+        except DockerError as e:
+            logger.error(f"failed to pull {self.server.image} for {self.name}: {e}")
+            return
+
+        self._schedule_refill()
+
+    async def _ensure_image(self):
+        async with self._image_lock:
+            if self._image_present:
+                return
+
+            try:
+                await self.docker.images.inspect(self.server.image)
+            except DockerError:
+                logger.info(f"pulling {self.server.image} for {self.name}")
+                await self.docker.images.pull(self.server.image)
+
+            self._image_present = True
+
+    async def _create(self) -> DockerContainer:
+        await self._ensure_image()
+
+        container_config: dict = {
+            "Image": self.server.image,
+            "Env": [f"{key}={value}" for key, value in self.server.env.items()],
+            "OpenStdin": True,
+            "AttachStdout": True,
+            "AttachStderr": True,
+            "Tty": False,
+            "HostConfig": {"AutoRemove": True},
+        }
+        if self.server.args:
+            container_config["Cmd"] = self.server.args
+
+        container = await self.docker.containers.create(container_config)
+        await container.start()
+        logger.debug(f"started container {container.id} for {self.name}")
+        return container
+
+    async def acquire(self) -> DockerContainer:
+        """A started container, from the standby pool when one is waiting"""
+        while self._containers:
+            container = self._containers.pop(0)
+            self._schedule_refill()
+            try:
+                state = (await container.show())["State"]
+            except DockerError:
+                continue
+            if state.get("Running"):
+                return container
+
+            await self.release(container)
+
+        self._schedule_refill()
+        return await self._create()
+
+    async def release(self, container: DockerContainer):
+        try:
+            await container.stop()
+            await container.delete()
+        except DockerError:
+            # auto removed containers may already be gone
+            pass
+
+    def _schedule_refill(self):
+        if self.standby <= 0:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self):
+        while len(self._containers) < self.standby:
+            try:
+                self._containers.append(await self._create())
+            except DockerError as e:
+                logger.error(f"failed to start standby container for {self.name}: {e}")
+                return
+
+    async def close(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+
+        containers, self._containers = self._containers, []
+        await asyncio.gather(*(self.release(container) for container in containers))
+
+        if self._docker is not None:
+            await self._docker.close()
+            self._docker = None
+
+
+@asynccontextmanager
+async def pooled_docker_client(pool: ContainerPool):
+    """
+    Client transport for Docker that talks to a container of the pool over its
+    stdin/stdout. The container is stopped when the transport exits.
+    """
+    read_stream: MemoryObjectReceiveStream[types.JSONRPCMessage | Exception]
+    read_stream_writer: MemoryObjectSendStream[types.JSONRPCMessage | Exception]
+
+    write_stream: MemoryObjectSendStream[types.JSONRPCMessage]
+    write_stream_reader: MemoryObjectReceiveStream[types.JSONRPCMessage]
+
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    container = await pool.acquire()
+    attach_result = container.attach(stdout=True, stdin=True)
+
+    async def read_from_stdout():
+        try:
+            async with read_stream_writer:
+                buffer = ""
+                while True:
+                    msg = await attach_result.read_out()
+                    if msg is None:
+                        # the container exited
+                        return
+
+                    chunk = msg.data
+                    if isinstance(chunk, bytes):
+                        chunk = chunk.decode("utf-8")
+                    lines = (buffer + chunk).split("\n")
+                    buffer = lines.pop()
+
+                    for line in lines:
+                        try:
+                            json_message = types.JSONRPCMessage.model_validate_json(line)
+                            await read_stream_writer.send(json_message)
+                        except Exception as exc:
+                            await read_stream_writer.send(exc)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async def write_to_stdin():
+        try:
+            async with write_stream_reader:
+                async for message in write_stream_reader:
+                    json = message.model_dump_json(by_alias=True, exclude_none=True)
+                    await attach_result.write_in(json.encode("utf-8") + b"\n")
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(read_from_stdout)
+            tg.start_soon(write_to_stdin)
+            yield read_stream, write_stream
+            tg.cancel_scope.cancel()
+    finally:
+        await attach_result.close()
+        await pool.release(container)
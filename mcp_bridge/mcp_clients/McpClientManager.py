@@ -1,9 +1,15 @@
-from typing import Union, Optional, List
+import asyncio
+import time
+from typing import Iterable, Union, Optional, List
 from loguru import logger
-from mcp import McpError, StdioServerParameters
+from mcp import StdioServerParameters, Tool
+from mcp.types import ListPromptsResult, ListResourcesResult, ListToolsResult
 from mcpx.client.transports.docker import DockerMCPServer
-from mcp_bridge.config import config
+from mcp_bridge.config import config, policy
 from mcp_bridge.config.final import SSEMCPServer
+from mcp_bridge.health import manager as health_manager, UnhealthyEvent
+from mcp_bridge.models.serverCatalog import ServerCatalog
+from .CatalogSnapshot import load_snapshot, save_snapshot
 from .DockerClient import DockerClient
 from .SseClient import SseClient
 from .StdioClient import StdioClient
@@ -12,32 +18,208 @@ client_types = Union[StdioClient, SseClient, DockerClient]
 
 class MCPClientManager:
     clients: dict[str, client_types] = {}
+    catalogs: dict[str, ServerCatalog] = {}
+    catalog_version: int = 0  # bumped whenever any catalog changes
+
+    # name -> servers offering it, in config order so the first entry wins
+    tool_index: dict[str, list[str]] = {}
+    prompt_index: dict[str, list[str]] = {}
+    tool_collisions: dict[str, list[str]] = {}
 
     async def initialize(self):
         logger.log("DEBUG", "Initializing MCP Client Manager")
+        self._load_snapshot()
+
+        enabled = []
         for server_name, server_config in config.mcp_servers.items():
             if server_config.disabled:
                 logger.log("DEBUG", f"Server {server_name} is disabled, skipping")
                 continue
-            self.clients[server_name] = await self.construct_client(
-                server_name, server_config
-            )
+            enabled.append((server_name, server_config))
+
+        clients = await asyncio.gather(
+            *(self.construct_client(name, server_config) for name, server_config in enabled)
+        )
+        # register in config order, routing prefers the first server offering a tool
+        for (server_name, _), client in zip(enabled, clients):
+            self.clients[server_name] = client
+
+        # the servers are known now, so the snapshot catalogs can be indexed
+        if self.catalogs:
+            self._rebuild_index()
+
+    async def shutdown(self):
+        """Close the sessions of every server"""
+        await asyncio.gather(
+            *(client.close() for client in self.clients.values()), return_exceptions=True
+        )
+
+    def _load_snapshot(self):
+        """Serve the persisted catalogs until the servers are up and confirm them"""
+        if config.catalog.snapshot_file is None:
+            return
+
+        enabled = {
+            name: server_config
+            for name, server_config in config.mcp_servers.items()
+            if not server_config.disabled
+        }
+        self.catalogs.update(load_snapshot(config.catalog.snapshot_file, enabled))
+        logger.info(f"loaded {len(self.catalogs)} catalogs from {config.catalog.snapshot_file}")
+
+    async def _save_snapshot(self):
+        if config.catalog.snapshot_file is None:
+            return
+
+        await save_snapshot(
+            config.catalog.snapshot_file,
+            self.catalogs,
+            config.mcp_servers,
+        )
 
     async def construct_client(self, name, server_config) -> client_types:
         logger.log("DEBUG", f"Constructing client for {server_config}")
+        client: client_types
         if isinstance(server_config.server, StdioServerParameters):
             client = StdioClient(name, server_config.server)
-            await client.start()
-            return client
-        if isinstance(server_config.server, SSEMCPServer):
+        elif isinstance(server_config.server, SSEMCPServer):
             client = SseClient(name, server_config.server)
-            await client.start()
-            return client
-        if isinstance(server_config.server, DockerMCPServer):
+        elif isinstance(server_config.server, DockerMCPServer):
             client = DockerClient(name, server_config.server)
-            await client.start()
-            return client
-        raise NotImplementedError("Client Type not supported")
+        else:
+            raise NotImplementedError("Client Type not supported")
+
+        client.on_catalog_changed = self.refresh_catalog
+        # lazy servers with a snapshot catalog have nothing to do until their first call
+        await client.start(start_sessions=name not in self.catalogs)
+        return client
+
+    async def refresh_catalog(self, server_name: str) -> Optional[ServerCatalog]:
+        """Fetch the tools, prompts and resources of a server and replace its cached catalog"""
+        client = self.clients.get(server_name)
+        if client is None or client.session is None:
+            return self.catalogs.get(server_name)
+
+        tools, prompts, resources = await asyncio.gather(
+            client.session.list_tools(),
+            client.session.list_prompts(),
+            client.session.list_resources(),
+            return_exceptions=True,
+        )
+
+        if isinstance(tools, BaseException):
+            logger.error(f"failed to refresh tool catalog for {server_name}: {tools}")
+            return self.catalogs.get(server_name)
+
+        # prompts and resources are optional, servers without the capability answer with an error
+        if isinstance(prompts, BaseException):
+            logger.debug(f"no prompts listed for {server_name}: {prompts}")
+            prompts = ListPromptsResult(prompts=[])
+        if isinstance(resources, BaseException):
+            logger.debug(f"no resources listed for {server_name}: {resources}")
+            resources = ListResourcesResult(resources=[])
+
+        assert isinstance(tools, ListToolsResult)
+        catalog = ServerCatalog(
+            tools=tools.tools,
+            prompts=prompts.prompts,
+            resources=resources.resources,
+            fetched_at=time.monotonic(),
+        )
+        previous = self.catalogs.get(server_name)
+        self.catalogs[server_name] = catalog
+
+        unchanged = previous is not None and previous.model_dump(
+            exclude={"fetched_at", "stale"}
+        ) == catalog.model_dump(exclude={"fetched_at", "stale"})
+        if previous is not None and previous.stale:
+            if unchanged:
+                logger.info(f"snapshot catalog of {server_name} confirmed by the server")
+            else:
+                logger.info(f"snapshot catalog of {server_name} replaced by the server's catalog")
+        if unchanged:
+            # the index and snapshot still describe the same catalog
+            return catalog
+
+        logger.debug(f"refreshed tool catalog for {server_name}: {len(catalog.tools)} tools")
+        self._rebuild_index()
+        await self._save_snapshot()
+        return catalog
+
+    def _rebuild_index(self):
+        """Rebuild the name -> server routing index from the cached catalogs"""
+        tool_index: dict[str, list[str]] = {}
+        prompt_index: dict[str, list[str]] = {}
+
+        for name in self.clients:
+            catalog = self.catalogs.get(name)
+            if catalog is None:
+                continue
+            for tool in catalog.tools:
+                tool_index.setdefault(tool.name, []).append(name)
+            for prompt in catalog.prompts:
+                prompt_index.setdefault(prompt.name, []).append(name)
+
+        collisions = {
+            tool: servers for tool, servers in tool_index.items() if len(servers) > 1
+        }
+        for tool, servers in collisions.items():
+            if self.tool_collisions.get(tool) == servers:
+                continue
+            message = f"tool '{tool}' is provided by multiple servers {servers}, calls are routed to '{servers[0]}'"
+            logger.warning(message)
+            health_manager.add_unhealthy_event(
+                UnhealthyEvent(name=f"tool name collision: {message}", severity="warning")
+            )
+
+        self.tool_index = tool_index
+        self.prompt_index = prompt_index
+        self.tool_collisions = collisions
+        self.catalog_version += 1
+
+    async def _load_missing_catalogs(self):
+        """Fill the catalogs of servers that came up before their first refresh"""
+        missing = [
+            name
+            for name, client in self.clients.items()
+            if name not in self.catalogs and client.session is not None
+        ]
+        if missing:
+            await asyncio.gather(*(self.refresh_catalog(name) for name in missing))
+
+    async def refresh_expired_catalogs(self, server_names: Iterable[str]):
+        """Refresh the catalogs of the given servers whose ttl has passed or that came up without one"""
+        expired = []
+        for name in server_names:
+            catalog = self.catalogs.get(name)
+            if catalog is None:
+                client = self.clients.get(name)
+                if client is not None and client.session is not None:
+                    expired.append(name)
+            elif catalog.is_expired(config.catalog.ttl):
+                expired.append(name)
+        if expired:
+            await asyncio.gather(*(self.refresh_catalog(name) for name in expired))
+
+    async def get_tools(self, server_name: str) -> list[Tool]:
+        """Get the cached tools of a server, refreshing them once the ttl has passed"""
+        catalog = self.catalogs.get(server_name)
+        if catalog is None or catalog.is_expired(config.catalog.ttl):
+            catalog = await self.refresh_catalog(server_name)
+
+        return catalog.tools if catalog is not None else []
+
+    def readiness(self) -> dict[str, bool]:
+        """Whether each required server is up, lazy servers count as up since they start on demand"""
+        required = config.readiness.required_servers
+        if required is None:
+            required = [name for name, client in self.clients.items() if not client.lazy]
+
+        return {
+            name: (client := self.clients.get(name)) is not None
+            and (client.lazy or client.session is not None)
+            for name in required
+        }
 
     def get_client(self, server_name: str):
         return self.clients[server_name]
@@ -46,47 +228,35 @@ class MCPClientManager:
         if model_name is None:
             return list(self.clients.items())
             
-        filtered_clients = []
-        for name, client in self.clients.items():
-            server_config = config.mcp_servers.get(name, {})
-            allowed_models = server_config.allowed_models
-            disallowed_models = server_config.disallowed_models
-            
-            # Check for model conflict - same model in both allowed and disallowed lists
-            if (allowed_models is not None and disallowed_models is not None and 
-                model_name in allowed_models and model_name in disallowed_models):
-                logger.error(f"Configuration error for server '{name}': Model '{model_name}' appears in both allowed_models and disallowed_models")
-                continue
-                
-            # Apply filtering based on allowed_models and disallowed_models
-            if ((allowed_models is None or model_name in allowed_models) and 
-                (disallowed_models is None or model_name not in disallowed_models)):
-                filtered_clients.append((name, client))
-                
-        return filtered_clients
+        return [
+            (name, self.clients[name])
+            for name in policy.servers_for_model(model_name)
+            if name in self.clients
+        ]
 
     async def get_client_from_tool(self, tool: str, model_name: Optional[str] = None):
-        for name, client in self.get_clients(model_name):
-            if not client.session:
-                continue
-            try:
-                list_tools = await client.session.list_tools()
-                for client_tool in list_tools.tools:
-                    if client_tool.name == tool:
-                        return client
-            except McpError:
-                continue
+        if tool not in self.tool_index:
+            await self._load_missing_catalogs()
+
+        return self._route(self.tool_index.get(tool, []), model_name)
 
     async def get_client_from_prompt(self, prompt: str, model_name: Optional[str] = None):
-        for name, client in self.get_clients(model_name):
-            if not client.session:
-                continue
-            try:
-                list_prompts = await client.session.list_prompts()
-                for client_prompt in list_prompts.prompts:
-                    if client_prompt.name == prompt:
-                        return client
-            except McpError:
-                continue
+        if prompt not in self.prompt_index:
+            await self._load_missing_catalogs()
+
+        return self._route(self.prompt_index.get(prompt, []), model_name)
+
+    def _route(self, server_names: list[str], model_name: Optional[str] = None):
+        if not server_names:
+            return None
+
+        if model_name is None:
+            return self.clients.get(server_names[0])
+
+        for name in server_names:
+            if policy.allows_model(name, model_name):
+                return self.clients.get(name)
+
+        return None
 
 ClientManager = MCPClientManager()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import asyncio
+import time
+from typing import Optional
+from mcp_bridge.mcp_clients.session import McpClientSession
+
+
+class Replica:
+    """One session of an MCP server, a client runs one or more of these"""
+
+    def __init__(self, index: int, max_concurrency: int) -> None:
+        self.index = index
+        self.session: Optional[McpClientSession] = None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0  # calls queued on or running against this replica
+        self.last_used = time.monotonic()
+        self.ping_rtt: Optional[float] = None  # seconds, of the last keepalive ping
+        self.evicted = asyncio.Event()  # set to make the maintainer replace the session
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.session is not None
+
+    def is_idle(self, idle_for: float) -> bool:
+        return self.in_flight == 0 and time.monotonic() - self.last_used > idle_for
+
+    def __repr__(self) -> str:
+        return f"Replica(index={self.index}, ready={self.ready}, in_flight={self.in_flight})"
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Callable, Coroutine, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Joins concurrent calls with the same key onto a single in-flight task"""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Task[T]] = {}
+        self._waiters: dict[str, int] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Coroutine[Any, Any, T]],
+        timeout: Optional[float] = None,
+    ) -> T:
+        """Join or start the call for `key`, waiting at most `timeout` seconds for its result"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        self._waiters[key] += 1
+        try:
+            # shielded so a waiter that is cancelled or times out does not cancel the call for the others
+            async with asyncio.timeout(timeout):
+                return await asyncio.shield(task)
+        except (asyncio.CancelledError, TimeoutError):
+            if self._calls.get(key) is task and self._waiters[key] == 1:
+                # nobody else waits for the result
+                task.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
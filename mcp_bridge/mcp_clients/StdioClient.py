@@ -1,8 +1,5 @@
-import asyncio
 from mcp import StdioServerParameters, stdio_client
 
-from mcp_bridge.config import config
-from mcp_bridge.mcp_clients.session import McpClientSession
 from .AbstractClient import GenericMcpClient
 from loguru import logger
 import shutil
@@ -47,28 +44,5 @@ class StdioClient(GenericMcpClient):
 
         self.config = own_config
 
-    async def _maintain_session(self):
-        logger.debug(f"starting maintain session for {self.name}")
-        async with stdio_client(self.config) as client:
-            logger.debug(f"entered stdio_client context manager for {self.name}")
-            assert client[0] is not None, f"missing read stream for {self.name}"
-            assert client[1] is not None, f"missing write stream for {self.name}"
-            async with McpClientSession(*client) as session:
-                logger.debug(f"entered client session context manager for {self.name}")
-                await session.initialize()
-                logger.debug(f"finished initialise session for {self.name}")
-                self.session = session
-
-                try:
-                    while True:
-                        await asyncio.sleep(10)
-                        if config.logging.log_server_pings:
-                            logger.debug(f"pinging session for {self.name}")
-
-                        await session.send_ping()
-
-                except Exception as exc:
-                    logger.error(f"ping failed for {self.name}: {exc}")
-                    self.session = None
-
-        logger.debug(f"exiting session for {self.name}")
+    def _transport(self):
+        return stdio_client(self.config)
@@ -0,0 +1,50 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+from mcp.types import CallToolResult
+
+
+def tool_call_key(name: str, arguments: dict[str, Any]) -> str:
+    """Canonical key for a tool call, argument order and whitespace do not matter"""
+    return json.dumps(
+        [name, arguments], sort_keys=True, separators=(",", ":"), default=str
+    )
+
+
+class ToolResultCache:
+    """LRU cache of tool call results with a per entry expiry"""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CallToolResult]] = OrderedDict()
+
+    def get(self, key: str) -> CallToolResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: CallToolResult, ttl: float) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
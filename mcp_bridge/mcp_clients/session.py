@@ -1,10 +1,16 @@
+import time
 from datetime import timedelta
 from typing import Awaitable, Callable
 
+import anyio
 from loguru import logger
 import mcp.types as types
 from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
-from mcp.shared.session import BaseSession, RequestResponder
+from mcp.shared.session import (
+    BaseSession,
+    ReceiveResultT,
+    RequestResponder,
+)
 from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
 from pydantic import AnyUrl
 
@@ -15,6 +21,8 @@ sampling_function_signature = Callable[
     [types.CreateMessageRequestParams], Awaitable[types.CreateMessageResult]
 ]
 
+list_changed_callback = Callable[[], Awaitable[None]]
+
 
 class McpClientSession(
     BaseSession[
@@ -31,6 +39,7 @@ class McpClientSession(
         read_stream: MemoryObjectReceiveStream[types.JSONRPCMessage | Exception],
         write_stream: MemoryObjectSendStream[types.JSONRPCMessage],
         read_timeout_seconds: timedelta | None = None,
+        on_list_changed: list_changed_callback | None = None,
     ) -> None:
         super().__init__(
             read_stream,
@@ -39,6 +48,8 @@ class McpClientSession(
             types.ServerNotification,
             read_timeout_seconds=read_timeout_seconds,
         )
+        self._on_list_changed = on_list_changed
+        self.last_response_at = time.monotonic()  # last successful request, pings are skipped after traffic
 
     async def __aenter__(self):
         session = await super().__aenter__()
@@ -56,6 +67,14 @@ class McpClientSession(
                     elif isinstance(message, types.ServerNotification):
                         if isinstance(message.root, types.LoggingMessageNotification):
                             logger.debug(f"Received notification from server: {message.root.params}")                        
+                        elif isinstance(
+                            message.root,
+                            (types.ToolListChangedNotification, types.PromptListChangedNotification),
+                        ):
+                            logger.debug(f"Received {message.root.method} notification from server")
+                            if self._on_list_changed is not None:
+                                # refresh in the background so this loop keeps draining messages
+                                self._task_group.start_soon(self._on_list_changed)
                         else:
                             logger.debug(f"Received notification from server: {message}")                        
                     else:
@@ -65,6 +84,39 @@ class McpClientSession(
         except Exception as e:
             logger.exception(f"Message consumer task failed: {e}")
 
+    async def send_request(
+        self, request: types.ClientRequest, result_type: type[ReceiveResultT]
+    ) -> ReceiveResultT:
+        request_id = self._request_id  # the id super().send_request assigns to this request
+        try:
+            result = await super().send_request(request, result_type)
+        except anyio.get_cancelled_exc_class():
+            if not isinstance(request.root, types.InitializeRequest):
+                await self._notify_cancelled(request_id)
+            raise
+
+        self.last_response_at = time.monotonic()
+        return result
+
+    async def _notify_cancelled(self, request_id: int) -> None:
+        """Tell the server to stop working on a request nobody waits for anymore"""
+        self._response_streams.pop(request_id, None)
+        # shielded, the surrounding scope is already cancelled
+        with anyio.CancelScope(shield=True):
+            try:
+                await self.send_notification(
+                    types.ClientNotification(
+                        types.CancelledNotification(
+                            method="notifications/cancelled",
+                            params=types.CancelledNotificationParams(
+                                requestId=request_id, reason="cancelled by MCP-Bridge"
+                            ),
+                        )
+                    )
+                )
+            except Exception as e:
+                logger.debug(f"could not send cancellation for request {request_id}: {e}")
+
     async def initialize(self) -> types.InitializeResult:
         result = await self.send_request(
             types.ClientRequest(
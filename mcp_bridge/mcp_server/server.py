@@ -52,8 +52,8 @@ async def list_tools() -> list[types.Tool]:
             logger.error(f"Client '{name}' not found")
             continue
 
-        client_tools = await client.list_tools()
-        tools.extend(client_tools.tools)
+        # served from the catalog, so listing does not start lazy servers
+        tools.extend(await ClientManager.get_tools(name))
     return tools
 
 
@@ -5,6 +5,7 @@ from .sse_transport import SseServerTransport
 from fastapi import APIRouter, Request
 from pydantic import ValidationError
 from loguru import logger
+from mcp_bridge.metrics import instruments as metrics
 
 from .server import server, options
 
@@ -16,17 +17,21 @@ sse = SseServerTransport("/mcp-server/sse/messages")
 @router.get("/", response_class=StreamingResponse)
 async def handle_sse(request: Request):
     logger.info("new incoming SSE connection established")
-    async with sse.connect_sse(request) as streams:
-        try:
-            await server.run(streams[0], streams[1], options)
-        except BrokenResourceError:
-            pass
-        except asyncio.CancelledError:
-            pass
-        except ValidationError:
-            pass
-        except Exception:
-            raise
+    metrics.sse_sessions_active.inc()
+    try:
+        async with sse.connect_sse(request) as streams:
+            try:
+                await server.run(streams[0], streams[1], options)
+            except BrokenResourceError:
+                pass
+            except asyncio.CancelledError:
+                pass
+            except ValidationError:
+                pass
+            except Exception:
+                raise
+    finally:
+        metrics.sse_sessions_active.dec()
     await request.close()
 
 
@@ -0,0 +1,5 @@
+from .router import router
+from .registry import registry
+from . import instruments
+
+__all__ = ["router", "registry", "instruments"]
@@ -0,0 +1,76 @@
+from .registry import registry
+
+__all__ = [
+    "inference_duration",
+    "inference_ttft",
+    "chat_completion_rounds",
+    "tool_call_duration",
+    "tool_call_errors",
+    "tool_call_timeouts",
+    "tool_calls_in_flight",
+    "session_restarts",
+    "session_ping_rtt",
+    "sse_sessions_active",
+]
+
+# inference server
+
+inference_duration = registry.histogram(
+    "mcp_bridge_inference_request_duration_seconds",
+    "Duration of requests to the inference server, one per round of the chat loop",
+    ("model",),
+)
+inference_ttft = registry.histogram(
+    "mcp_bridge_inference_time_to_first_token_seconds",
+    "Time until the first chunk of a streamed inference request",
+    ("model",),
+)
+chat_completion_rounds = registry.histogram(
+    "mcp_bridge_chat_completion_rounds",
+    "Inference rounds per chat completion request",
+    ("model",),
+    buckets=(1, 2, 3, 4, 5, 8, 12, 20),
+)
+
+# tool calls
+
+tool_call_duration = registry.histogram(
+    "mcp_bridge_tool_call_duration_seconds",
+    "Duration of tool calls sent to MCP servers",
+    ("server", "tool"),
+)
+tool_call_errors = registry.counter(
+    "mcp_bridge_tool_call_errors_total",
+    "Tool calls that returned an error, timeouts excluded",
+    ("server", "tool"),
+)
+tool_call_timeouts = registry.counter(
+    "mcp_bridge_tool_call_timeouts_total",
+    "Tool calls that timed out",
+    ("server", "tool"),
+)
+
+# MCP sessions
+
+tool_calls_in_flight = registry.gauge(
+    "mcp_bridge_tool_calls_in_flight",
+    "Tool calls queued on or running against an MCP server",
+    ("server",),
+)
+session_restarts = registry.counter(
+    "mcp_bridge_session_restarts_total",
+    "Sessions restarted after they ended or failed",
+    ("server",),
+)
+session_ping_rtt = registry.gauge(
+    "mcp_bridge_session_ping_rtt_seconds",
+    "Round trip of the last keepalive ping of an MCP server",
+    ("server",),
+)
+
+# MCP server exposed by the bridge
+
+sse_sessions_active = registry.gauge(
+    "mcp_bridge_sse_sessions_active",
+    "Open SSE connections of clients using MCP-Bridge as an MCP server",
+)
@@ -0,0 +1,151 @@
+from bisect import bisect_left
+from typing import Any, Generic, TypeVar
+from loguru import logger
+
+__all__ = ["Counter", "Gauge", "Histogram", "MetricsRegistry", "registry"]
+
+# labels often come from requests (model names), so the series per metric are capped
+MAX_SERIES = 1000
+
+S = TypeVar("S")  # value kept per series
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric(Generic[S]):
+    """A metric family with a fixed set of label names, rendered in the Prometheus text format"""
+
+    type_name = ""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._series: dict[tuple[str, ...], S] = {}
+
+    def _label_text(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _has_room(self, values: tuple[str, ...]) -> bool:
+        if values in self._series or len(self._series) < MAX_SERIES:
+            return True
+        logger.warning(f"metric {self.name} reached {MAX_SERIES} series, dropping {values}")
+        return False
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type_name}"]
+        for values, value in self._series.items():
+            lines.extend(self._render_series(values, value))
+        return lines
+
+    def _render_series(self, values: tuple[str, ...], value: S) -> list[str]:
+        return [f"{self.name}{self._label_text(values)} {value}"]
+
+
+class Counter(Metric[float]):
+    type_name = "counter"
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        if self._has_room(values):
+            self._series[values] = self._series.get(values, 0) + amount
+
+
+class Gauge(Metric[float]):
+    type_name = "gauge"
+
+    def set(self, *values: str, value: float) -> None:
+        if self._has_room(values):
+            self._series[values] = value
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        if self._has_room(values):
+            self._series[values] = self._series.get(values, 0) + amount
+
+    def dec(self, *values: str, amount: float = 1) -> None:
+        self.inc(*values, amount=-amount)
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric[_HistogramSeries]):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    ) -> None:
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *values: str, value: float) -> None:
+        series = self._series.get(values)
+        if series is None:
+            if not self._has_room(values):
+                return
+            series = self._series[values] = _HistogramSeries(len(self.buckets) + 1)
+
+        # counts are kept per bucket and summed up when rendered
+        series.buckets[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def _render_series(self, values: tuple[str, ...], series: _HistogramSeries) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), series.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            labels = self._label_text(values, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {series.sum}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {series.count}")
+        return lines
+
+
+M = TypeVar("M", bound=Metric[Any])
+
+
+class MetricsRegistry:
+    """Holds every metric of the bridge"""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric[Any]] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: tuple[str, ...] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, description, labels, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry: MetricsRegistry = MetricsRegistry()
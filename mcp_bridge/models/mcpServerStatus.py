@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -5,3 +6,19 @@ class McpServerStatus(BaseModel):
     name: str = Field(..., description="Name of the MCP server")
     online: bool = Field(..., description="Whether the server is online")
     enabled: bool = Field(True, description="Whether the server is enabled")
+    replicas: int = Field(1, description="Number of sessions that are ready")
+    ping_rtt_ms: Optional[float] = Field(
+        None, description="Slowest round trip of the last keepalive pings of the sessions"
+    )
+    circuit: Literal["closed", "open", "half_open"] = Field(
+        "closed", description="Circuit breaker state of the server"
+    )
+    tool_cache_hits: int = Field(0, description="Tool calls answered from the result cache")
+    tool_cache_misses: int = Field(
+        0, description="Cacheable tool calls that were sent to the server"
+    )
+    tool_cache_size: int = Field(0, description="Tool results currently cached")
+    catalog_stale: bool = Field(
+        False,
+        description="Whether the tool catalog comes from the snapshot and was not yet confirmed by the server",
+    )
@@ -0,0 +1,25 @@
+import time
+from mcp.types import Prompt, Resource, Tool
+from pydantic import BaseModel, Field
+
+
+class ServerCatalog(BaseModel):
+    """Cached listing of what an MCP server offers"""
+
+    tools: list[Tool] = Field(default_factory=list, description="Tools of the server")
+    prompts: list[Prompt] = Field(
+        default_factory=list, description="Prompts of the server"
+    )
+    resources: list[Resource] = Field(
+        default_factory=list, description="Resources of the server"
+    )
+    fetched_at: float = Field(
+        default_factory=time.monotonic, description="Monotonic time of the last refresh"
+    )
+    stale: bool = Field(
+        default=False,
+        description="Loaded from a snapshot and not yet confirmed by the running server",
+    )
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.monotonic() - self.fetched_at > ttl
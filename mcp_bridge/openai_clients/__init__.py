@@ -1,6 +1,7 @@
-from .genericHttpxClient import get_client
+from .genericHttpxClient import get_client, get_headers
 from .completion import completions
 from .chatCompletion import chat_completions
 from .streamChatCompletion import streaming_chat_completions
+from .disconnectWatcher import run_until_disconnected
 
-__all__ = ["get_client", "completions", "chat_completions", "streaming_chat_completions"]
+__all__ = ["get_client", "get_headers", "completions", "chat_completions", "streaming_chat_completions", "run_until_disconnected"]
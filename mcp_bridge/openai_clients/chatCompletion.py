@@ -1,92 +1,137 @@
-import uuid
 from fastapi import Request
 from lmos_openai_types import (
     CreateChatCompletionRequest,
     CreateChatCompletionResponse,
     ChatCompletionRequestMessage,
 )
-from .utils import call_tool, chat_completion_add_tools
-from .genericHttpxClient import get_client
+from .utils import call_tools, chat_completion_add_tools, tool_result_message
+from .genericHttpxClient import get_client, get_headers
+from .requestSerializer import ChatRequestSerializer
+from .deadline import Deadline, stopped_message
+from mcp_bridge.config import config
+from mcp_bridge.metrics import instruments as metrics
+from mcp_bridge.tracing import tracer
 from mcp_bridge.mcp_clients.McpClientManager import ClientManager
 from mcp_bridge.tool_mappers import mcp2openai
 from loguru import logger
 import json
+import time
+import uuid
+
+
+def stopped_response(model_name: str, content: str) -> CreateChatCompletionResponse:
+    """Final answer for a loop stopped by its deadline or tool round limit"""
+    return CreateChatCompletionResponse.model_validate(
+        {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model_name,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "length",
+                    "logprobs": None,
+                }
+            ],
+        }
+    )
+
 
 async def chat_completions(
     request: CreateChatCompletionRequest,
     http_request: Request,
 ) -> CreateChatCompletionResponse:
     model_name = request.model
-    request = await chat_completion_add_tools(request)
+    deadline = Deadline.from_request(http_request)
+    max_tool_rounds = config.agent_loop.max_tool_rounds
+    tool_rounds = 0
+    inference_rounds = 0
+    with tracer.span("add_tools"):
+        request = await chat_completion_add_tools(request)
+    serializer = ChatRequestSerializer(request)
     
-    while True:
-        async with get_client(http_request) as client:
-            text = (
-                await client.post(
-                    "/chat/completions",
-                    json=request.model_dump(exclude_defaults=True, exclude_none=True, exclude_unset=True),
-                )
-            ).text
-        logger.debug(text)
+    try:
+        while True:
+            inference_rounds += 1
+            with tracer.span("round", round=inference_rounds):
+                with tracer.span("serialize"):
+                    content = serializer.serialize()
+                started = time.monotonic()
+                try:
+                    with tracer.span("inference"):
+                        text = (
+                            await deadline.run(
+                                get_client().post(
+                                    "/chat/completions",
+                                    content=content,
+                                    headers=get_headers(http_request),
+                                )
+                            )
+                        ).text
+                except TimeoutError:
+                    logger.warning(f"deadline of {deadline.seconds}s exceeded waiting for inference")
+                    return stopped_response(model_name, stopped_message(deadline, tool_rounds).lstrip())
+                metrics.inference_duration.observe(model_name, value=time.monotonic() - started)
+                logger.debug(text)
         
-        try:
-            response = CreateChatCompletionResponse.model_validate_json(text)
-        except Exception as e:
-            logger.error(f"Error parsing response: {text}")
-            logger.error(e)
-            return
+                try:
+                    with tracer.span("parse_response"):
+                        response = CreateChatCompletionResponse.model_validate_json(text)
+                except Exception as e:
+                    logger.error(f"Error parsing response: {text}")
+                    logger.error(e)
+                    return
             
-        msg = response.choices[0].message
-        msg = ChatCompletionRequestMessage(
-            role="assistant",
-            content=msg.content,
-            tool_calls=msg.tool_calls,
-        )
-        request.messages.append(msg)
+                msg = response.choices[0].message
+                msg = ChatCompletionRequestMessage(
+                    role="assistant",
+                    content=msg.content,
+                    tool_calls=msg.tool_calls,
+                )
+                request.messages.append(msg)
         
-        logger.debug(f"finish reason: {response.choices[0].finish_reason}")
-        if response.choices[0].finish_reason.value in ["stop", "length"]:
-            logger.debug("no tool calls found")
-            return response
-            
-        logger.debug("tool calls found")
-        for tool_call in response.choices[0].message.tool_calls.root:
-            logger.debug(
-                f"tool call: {tool_call.function.name} arguments: {json.loads(tool_call.function.arguments)}"
-            )
+                logger.debug(f"finish reason: {response.choices[0].finish_reason}")
+                if response.choices[0].finish_reason.value in ["stop", "length"]:
+                    logger.debug("no tool calls found")
+                    return response
             
-            tool_call_result = await call_tool(
-                tool_call.function.name, tool_call.function.arguments, model_name=model_name
-            )
-            
-            if tool_call_result is None:
-                continue
-                
-            logger.debug(
-                f"tool call result for {tool_call.function.name}: {tool_call_result.model_dump()}"
-            )
-            logger.debug(f"tool call result content: {tool_call_result.content}")
-            
-            tools_content = [
-                {"type": "text", "text": part.text}
-                for part in filter(lambda x: x.type == "text", tool_call_result.content)
-            ]
-            
-            if len(tools_content) == 0:
-                tools_content = [
-                    {"type": "text", "text": "the tool call result is empty"}
-                ]
+                logger.debug("tool calls found")
+                if deadline.expired or (
+                    max_tool_rounds is not None and tool_rounds >= max_tool_rounds
+                ):
+                    logger.warning(f"stopping after {tool_rounds} tool rounds")
+                    return stopped_response(
+                        model_name,
+                        (response.choices[0].message.content or "")
+                        + stopped_message(deadline, tool_rounds),
+                    )
+                tool_rounds += 1
+        
+                tool_calls = response.choices[0].message.tool_calls.root
+                for tool_call in tool_calls:
+                    logger.debug(
+                        f"tool call: {tool_call.function.name} arguments: {json.loads(tool_call.function.arguments)}"
+                    )
+
+                # run the calls concurrently, results come back in tool_call order
+                with tracer.span("tool_calls", count=len(tool_calls)):
+                    tool_call_results = await call_tools(
+                        tool_calls, model_name=model_name, timeout=deadline.remaining()
+                    )
+
+                for tool_call, tool_call_result in zip(tool_calls, tool_call_results):
+                    if tool_call_result is None:
+                        continue
                 
-            tool_call_id = tool_call.id if tool_call.id and tool_call.id.strip() else uuid.uuid4().hex[:16]
+                    logger.debug(
+                        f"tool call result for {tool_call.function.name}: {tool_call_result.model_dump()}"
+                    )
+                    logger.debug(f"tool call result content: {tool_call_result.content}")
             
-            request.messages.append(
-                ChatCompletionRequestMessage.model_validate(
-                    {
-                        "role": "tool",
-                        "content": tools_content,
-                        "tool_call_id": tool_call_id,
-                    }
-                )
-            )
+                    request.messages.append(tool_result_message(tool_call.id, tool_call_result))
             
-            logger.debug("sending next iteration of chat completion request")
\ No newline at end of file
+                logger.debug("sending next iteration of chat completion request")
+    finally:
+        metrics.chat_completion_rounds.observe(model_name, value=inference_rounds)
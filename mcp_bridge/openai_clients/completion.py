@@ -1,16 +1,16 @@
 from fastapi import Request
 from lmos_openai_types import CreateCompletionRequest
-from .genericHttpxClient import get_client
+from .genericHttpxClient import get_client, get_headers
 
 
 async def completions(request: CreateCompletionRequest, http_request: Request) -> dict:
     """performs a completion using the inference server"""
 
-    async with get_client(http_request) as client:
-        response = await client.post(
-            "/completions",
-            json=request.model_dump(
-                exclude_defaults=True, exclude_none=True, exclude_unset=True
-            ),
-        )
+    response = await get_client().post(
+        "/completions",
+        json=request.model_dump(
+            exclude_defaults=True, exclude_none=True, exclude_unset=True
+        ),
+        headers=get_headers(http_request),
+    )
     return response.json()
@@ -0,0 +1,75 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Optional, TypeVar
+import httpx
+from fastapi import Request
+from loguru import logger
+from mcp_bridge.config import config
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Time budget of one chat completion request across all inference and tool rounds"""
+
+    def __init__(self, seconds: Optional[float]) -> None:
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def from_request(cls, http_request: Request) -> "Deadline":
+        """The configured deadline, shortened by the deadline header of the request"""
+        seconds = config.agent_loop.deadline
+
+        header = http_request.headers.get(config.agent_loop.deadline_header)
+        if header is not None:
+            try:
+                requested = float(header)
+            except ValueError:
+                requested = math.nan
+
+            # nan, inf and non-positive values would expire at once or never
+            if math.isfinite(requested) and requested > 0:
+                seconds = requested if seconds is None else min(seconds, requested)
+            else:
+                logger.warning(f"ignoring invalid {config.agent_loop.deadline_header} header: {header}")
+
+        return cls(seconds)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0)
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def httpx_timeout(self):
+        """Timeout for an httpx request, the client default without a deadline"""
+        remaining = self.remaining()
+        if remaining is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(
+            remaining, connect=min(config.inference_server.connect_timeout, remaining)
+        )
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Await within the remaining budget, raises TimeoutError once it runs out"""
+        async with asyncio.timeout(self.remaining()):
+            return await awaitable
+
+
+def stopped_message(deadline: Deadline, tool_rounds: int, upstream_timeout: bool = False) -> str:
+    """Note appended to the answer when the loop is stopped before the model finished"""
+    if deadline.expired:
+        reason = f"the time budget of {deadline.seconds:g}s ran out"
+    elif upstream_timeout:
+        reason = "the inference server did not answer in time"
+    else:
+        reason = f"the limit of {tool_rounds} tool rounds was reached"
+
+    return f"\n\n[MCP-Bridge stopped this answer because {reason}.]"
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Awaitable, TypeVar
+from fastapi import HTTPException, Request
+from loguru import logger
+
+T = TypeVar("T")
+
+# seconds between checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+async def _watch(http_request: Request, task: asyncio.Future) -> bool:
+    """Cancel the task once the client disconnects, returns whether it did"""
+    while not task.done():
+        if await http_request.is_disconnected():
+            logger.info("client disconnected, cancelling its chat completion")
+            task.cancel()
+            return True
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+    return False
+
+
+async def run_until_disconnected(http_request: Request, coro: Awaitable[T]) -> T:
+    """
+    Await the coroutine, cancelling it when the client goes away.
+
+    Cancellation reaches the inference request and the running tool calls, which
+    notify their MCP servers.
+    """
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.create_task(_watch(http_request, task))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if watcher.done() and not watcher.cancelled() and watcher.result():
+            # 499 is the de facto status for a request the client closed
+            raise HTTPException(status_code=499, detail="Client disconnected")
+        raise
+    finally:
+        watcher.cancel()
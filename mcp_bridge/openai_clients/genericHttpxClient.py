@@ -1,41 +1,67 @@
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, Timeout
 from mcp_bridge.config import config
 from fastapi import Request
-from contextlib import asynccontextmanager
 
-async def create_client(request: Request = None):
-    """Creates a new client instance with the appropriate headers"""
-    client = AsyncClient(
-        base_url=config.inference_server.base_url,
+__all__ = ["get_client", "get_headers", "start_client", "close_client"]
+
+openwebui_headers = [
+    "x-openwebui-user-name",
+    "x-openwebui-user-id",
+    "x-openwebui-user-email",
+    "x-openwebui-user-role",
+]
+
+_client: AsyncClient | None = None
+
+
+def create_client() -> AsyncClient:
+    """Creates a new pooled client instance for the inference server"""
+    settings = config.inference_server
+    return AsyncClient(
+        base_url=settings.base_url,
         headers={
-            "Authorization": f"Bearer {config.inference_server.api_key}",
-            "Content-Type": "application/json"
+            "Authorization": f"Bearer {settings.api_key}",
+            "Content-Type": "application/json",
         },
-        timeout=10000,
+        timeout=Timeout(settings.timeout, connect=settings.connect_timeout),
+        limits=Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
     )
-    
-    if request:
-        # Dodaj nagłówki z żądania
-        headers = {k.lower(): v for k, v in request.headers.items()}
-        
-        openwebui_headers = [
-            "x-openwebui-user-name",
-            "x-openwebui-user-id",
-            "x-openwebui-user-email",
-            "x-openwebui-user-role"
-        ]
-        
-        for header in openwebui_headers:
-            if header in headers:
-                client.headers[header] = headers[header]
-    
-    return client
-
-@asynccontextmanager
-async def get_client(request: Request = None):
-    """Context manager for HTTP client"""
-    client = await create_client(request)
-    try:
-        yield client
-    finally:
-        await client.aclose()
+
+
+async def start_client() -> None:
+    """Creates the shared client, called from the fastapi lifespan"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+
+
+async def close_client() -> None:
+    """Closes the shared client and its connection pool"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> AsyncClient:
+    """Returns the shared client, creating it if the lifespan has not run yet"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def get_headers(request: Request | None = None) -> dict[str, str]:
+    """Per request headers which are forwarded to the inference server"""
+    if request is None:
+        return {}
+
+    return {
+        header: value
+        for header in openwebui_headers
+        if (value := request.headers.get(header)) is not None
+    }
@@ -0,0 +1,28 @@
+from lmos_openai_types import CreateChatCompletionRequest
+
+dump_options = dict(exclude_defaults=True, exclude_none=True, exclude_unset=True)
+
+
+class ChatRequestSerializer:
+    """
+    Serializes a chat completion request across iterations of the agentic loop.
+
+    Everything except the messages (model, tools, ...) is serialized once, and each
+    message is serialized the first time it is sent. Later iterations only serialize
+    the messages appended since the previous call.
+    """
+
+    def __init__(self, request: CreateChatCompletionRequest) -> None:
+        self.request = request
+
+        head = request.model_dump_json(exclude={"messages"}, **dump_options)
+        self._head = head[:-1]  # drop the closing brace, the messages are appended
+        self._separator = "," if head != "{}" else ""
+        self._messages: list[str] = []
+
+    def serialize(self) -> str:
+        messages = self.request.messages
+        for message in messages[len(self._messages) :]:
+            self._messages.append(message.model_dump_json(**dump_options))
+
+        return f'{self._head}{self._separator}"messages":[{",".join(self._messages)}]}}'
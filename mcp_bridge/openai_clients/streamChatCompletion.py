@@ -1,6 +1,9 @@
+import asyncio
 import json
+import time
 from typing import Optional
 import uuid
+import httpx
 from fastapi import HTTPException, Request
 from lmos_openai_types import (
     ChatCompletionMessageToolCall,
@@ -9,15 +12,216 @@ from lmos_openai_types import (
     CreateChatCompletionStreamResponse,
     Function1,
 )
-from .utils import call_tool, chat_completion_add_tools
-from mcp_bridge.models import SSEData
-from .genericHttpxClient import get_client
+from mcp.types import CallToolResult
+from .utils import call_tool, chat_completion_add_tools, gather_or_cancel, tool_result_message
+from mcp_bridge.config import config
+from mcp_bridge.metrics import instruments as metrics
+from mcp_bridge.tracing import tracer
+from .genericHttpxClient import get_client, get_headers
+from .requestSerializer import ChatRequestSerializer
+from .deadline import Deadline, stopped_message
 from mcp_bridge.mcp_clients.McpClientManager import ClientManager
 from mcp_bridge.tool_mappers import mcp2openai
 from loguru import logger
 from httpx_sse import aconnect_sse
 from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 
+class JsonCompletionScanner:
+    """Incrementally tracks whether a streamed JSON object has been closed"""
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.closed = False
+        self.trailing = False
+
+    def feed(self, fragment: str) -> None:
+        for char in fragment:
+            if self.closed:
+                if not char.isspace():
+                    self.trailing = True
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+
+    @property
+    def complete(self) -> bool:
+        return self.closed and not self.trailing
+
+
+class StreamedToolCall:
+    """A single tool call rebuilt from streamed deltas"""
+
+    def __init__(self) -> None:
+        self.id: str = ""
+        self.name: str = ""
+        self.arguments: str = ""
+        self.scanner = JsonCompletionScanner()
+
+        # set when the call was started before the stream finished
+        self.speculative_task: Optional[asyncio.Task] = None
+        self.speculative_arguments: str = ""
+
+    def to_tool_call(self) -> ChatCompletionMessageToolCall:
+        if not self.id:
+            self.id = uuid.uuid4().hex[:16]
+
+        return ChatCompletionMessageToolCall(
+            id=self.id,
+            type="function",
+            function=Function1(name=self.name, arguments=self.arguments),
+        )
+
+
+class ToolCallAccumulator:
+    """Collects the `delta.tool_calls` fragments of a stream, keyed by their index"""
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        speculative: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        self.tool_calls: dict[int, StreamedToolCall] = {}
+        self.model_name = model_name
+        self.speculative = speculative
+        self.deadline = deadline or Deadline(None)
+
+    def add(self, delta_tool_calls) -> None:
+        for delta in delta_tool_calls:
+            if delta.index not in self.tool_calls:
+                # a new tool call begins, so the earlier ones are done streaming
+                self._start_speculative_calls()
+                self.tool_calls[delta.index] = StreamedToolCall()
+
+            tool_call = self.tool_calls[delta.index]
+
+            if delta.id:
+                tool_call.id = delta.id
+
+            if delta.function is None:
+                continue
+
+            if delta.function.name and not tool_call.name:
+                tool_call.name = delta.function.name
+
+            if delta.function.arguments:
+                tool_call.arguments += delta.function.arguments
+                if self.speculative:
+                    tool_call.scanner.feed(delta.function.arguments)
+
+    def _start_speculative_calls(self) -> None:
+        if not self.speculative:
+            return
+
+        for index, tool_call in self.tool_calls.items():
+            if tool_call.speculative_task is not None or not tool_call.name:
+                continue
+            if not tool_call.scanner.complete:
+                continue
+
+            try:
+                json.loads(tool_call.arguments)
+            except json.JSONDecodeError:
+                continue
+
+            logger.debug(f"speculatively starting tool call {index}: {tool_call.name}")
+            tool_call.speculative_arguments = tool_call.arguments
+            tool_call.speculative_task = asyncio.create_task(
+                call_tool(
+                    tool_call.name,
+                    tool_call.arguments,
+                    timeout=self.deadline.remaining(),
+                    model_name=self.model_name,
+                )
+            )
+
+    def to_tool_calls(self) -> list[ChatCompletionMessageToolCall]:
+        return [
+            self.tool_calls[index].to_tool_call() for index in sorted(self.tool_calls)
+        ]
+
+    async def call_tools(self) -> list[Optional[CallToolResult]]:
+        """Run every tool call, reusing speculative results whose arguments did not change"""
+        return await gather_or_cancel(
+            self._call_tool(self.tool_calls[index]) for index in sorted(self.tool_calls)
+        )
+
+    async def _call_tool(self, tool_call: StreamedToolCall) -> Optional[CallToolResult]:
+        if tool_call.speculative_task is not None:
+            if tool_call.speculative_arguments == tool_call.arguments:
+                return await tool_call.speculative_task
+
+            logger.debug(f"arguments of {tool_call.name} changed, discarding speculative call")
+            tool_call.speculative_task.cancel()
+
+        return await call_tool(
+            tool_call.name,
+            tool_call.arguments,
+            timeout=self.deadline.remaining(),
+            model_name=self.model_name,
+        )
+
+    def cancel(self) -> None:
+        """Cancel speculative calls which are no longer needed"""
+        for tool_call in self.tool_calls.values():
+            if tool_call.speculative_task is not None:
+                tool_call.speculative_task.cancel()
+
+
+def stopped_chunk(model_name: str, content: str) -> str:
+    """Last chunk of a stream stopped by its deadline or tool round limit"""
+    return json.dumps(
+        {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model_name,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": content},
+                    "finish_reason": "length",
+                }
+            ],
+        }
+    )
+
+
+def read_chunk(data: str) -> tuple[str, Optional[str], bool]:
+    """Read content, finish_reason and whether tool calls are present from a raw chunk"""
+    chunk = json.loads(data)
+    choices = chunk.get("choices")
+    if not choices:
+        return "", None, False
+
+    choice = choices[0]
+    delta = choice.get("delta") or {}
+
+    finish_reason = choice.get("finish_reason")
+    if isinstance(finish_reason, str):
+        finish_reason = finish_reason.lower()
+
+    return delta.get("content") or "", finish_reason, bool(delta.get("tool_calls"))
+
+
 async def streaming_chat_completions(request: CreateChatCompletionRequest, http_request: Request):
     try:
         return EventSourceResponse(
@@ -30,156 +234,193 @@ async def streaming_chat_completions(request: CreateChatCompletionRequest, http_
 
 async def chat_completions(request: CreateChatCompletionRequest, http_request: Request):
     model_name = request.model
+    trace = tracer.current()
     request.stream = True
-    request = await chat_completion_add_tools(request)
+    with tracer.span("add_tools"):
+        request = await chat_completion_add_tools(request)
+    serializer = ChatRequestSerializer(request)
+    deadline = Deadline.from_request(http_request)
+    max_tool_rounds = config.agent_loop.max_tool_rounds
+    tool_rounds = 0
+    inference_rounds = 0
     fully_done = False
+    tool_call_accumulator: Optional[ToolCallAccumulator] = None
     
-    while not fully_done:
-        json_data = json.dumps(request.model_dump(
-            exclude_defaults=True, exclude_none=True, exclude_unset=True
-        ))
-        last: Optional[CreateChatCompletionStreamResponse] = None
-        tool_call_name: str = ""
-        tool_call_json: str = ""
-        should_forward: bool = True
-        response_content: str = ""
-        tool_call_id: str = ""
+    try:
+        while not fully_done:
+            if await http_request.is_disconnected():
+                logger.info("client disconnected, stopping chat completion")
+                return
+
+            if deadline.expired:
+                logger.warning(f"deadline of {deadline.seconds}s exceeded before the next inference round")
+                yield stopped_chunk(model_name, stopped_message(deadline, tool_rounds))
+                fully_done = True
+                continue
+                
+            inference_rounds += 1
+            with tracer.span("round", round=inference_rounds):
+                with tracer.span("serialize"):
+                    json_data = serializer.serialize()
+                finish_reason: Optional[str] = None
+                tool_call_accumulator = ToolCallAccumulator(
+                    model_name,
+                    speculative=config.tool_calls.speculative_execution,
+                    deadline=deadline,
+                )
+                should_forward: bool = True
+                response_content: list[str] = []
+                timed_out = False
+                upstream_timeout = False
+                started = time.monotonic()
+                first_chunk = True
         
-        async with get_client(http_request) as client:
-            async with aconnect_sse(
-                client, "post", "/chat/completions", content=json_data
-            ) as event_source:
-                if "Content-Type" in event_source.response.headers:
-                    content_type = event_source.response.headers["Content-Type"]
-                    if "text/event-stream" not in content_type:
-                        logger.error(f"Unexpected Content-Type: {content_type}")
-                        error_data = await event_source.response.aread()
-                        logger.error(f"Request URL: {event_source.response.url}")
-                        logger.error(f"Request Data: {json_data}")
-                        logger.error(f"Response Status: {event_source.response.status_code}")
-                        logger.error(f"Response Data: {error_data.decode(event_source.response.encoding or 'utf-8')}")
-                        raise HTTPException(status_code=500, detail="Unexpected Content-Type")
+                try:
+                    with tracer.span("inference"):
+                        async with aconnect_sse(
+                            get_client(),
+                            "post",
+                            "/chat/completions",
+                            content=json_data,
+                            headers=get_headers(http_request),
+                            timeout=deadline.httpx_timeout(),
+                        ) as event_source:
+                            if "Content-Type" in event_source.response.headers:
+                                content_type = event_source.response.headers["Content-Type"]
+                                if "text/event-stream" not in content_type:
+                                    logger.error(f"Unexpected Content-Type: {content_type}")
+                                    error_data = await event_source.response.aread()
+                                    logger.error(f"Request URL: {event_source.response.url}")
+                                    logger.error(f"Request Data: {json_data}")
+                                    logger.error(f"Response Status: {event_source.response.status_code}")
+                                    logger.error(f"Response Data: {error_data.decode(event_source.response.encoding or 'utf-8')}")
+                                    raise HTTPException(status_code=500, detail="Unexpected Content-Type")
+            
+                            events = event_source.aiter_sse()
+                            while True:
+                                if deadline.expires_at is None:
+                                    sse = await anext(events, None)
+                                else:
+                                    # only the reads are bounded, one timeout around the round would also
+                                    # fire while this generator is suspended at a yield
+                                    try:
+                                        sse = await deadline.run(anext(events, None))
+                                    except TimeoutError:
+                                        timed_out = True
+                                        break
+                                if sse is None:
+                                    break
+                                if first_chunk:
+                                    metrics.inference_ttft.observe(model_name, value=time.monotonic() - started)
+                                    first_chunk = False
+                        
+                                data = sse.data
+                
+                                logger.debug(
+                                    "event: {},\ndata: {},\nid: {},\nretry: {}", sse.event, data, sse.id, sse.retry
+                                )
                 
-                async for sse in event_source.aiter_sse():
-                    event = sse.event
-                    data = sse.data
-                    id = sse.id
-                    retry = sse.retry
+                                if data == "[DONE]":
+                                    logger.debug("inference serverstream done")
+                                    break
                     
-                    logger.debug(
-                        f"event: {event},\ndata: {data},\nid: {id},\nretry: {retry}"
-                    )
+                                try:
+                                    content, chunk_finish_reason, has_tool_calls = read_chunk(data)
+                                except Exception as e:
+                                    logger.debug(data)
+                                    raise e
                     
-                    if data == "[DONE]":
-                        logger.debug("inference serverstream done")
-                        break
-                        
-                    try:
-                        data['choices'][0]['finish_reason'] = data['choices'][0]['finish_reason'].lower()
-                    except Exception as e:
-                        logger.debug(f"failed to lowercase finish_reason: {e}")
-                        
-                    try:
-                        parsed_data = CreateChatCompletionStreamResponse.model_validate_json(
-                            data
-                        )
-                    except Exception as e:
-                        logger.debug(data)
-                        raise e
+                                response_content.append(content)
+                
+                                if chunk_finish_reason is not None:
+                                    finish_reason = chunk_finish_reason
+                                    if chunk_finish_reason in ["stop", "length"]:
+                                        fully_done = True
+                                    else:
+                                        should_forward = False
                         
-                    content = parsed_data.choices[0].delta.content
-                    content = content if content is not None else ""
-                    response_content += content
+                                if has_tool_calls:
+                                    # only chunks carrying tool calls need the full model
+                                    should_forward = False
+                                    parsed_data = CreateChatCompletionStreamResponse.model_validate_json(data)
+                                    tool_call_accumulator.add(parsed_data.choices[0].delta.tool_calls)
                     
-                    if parsed_data.choices[0].finish_reason is not None:
-                        if parsed_data.choices[0].finish_reason.value in [
-                            "stop",
-                            "length",
-                        ]:
-                            fully_done = True
-                        else:
-                            should_forward = False
-                            
-                    if parsed_data.choices[0].delta.tool_calls is not None:
-                        should_forward = False
-                        assert (
-                            parsed_data.choices[0].delta.tool_calls[0].function is not None
-                        )
-                        name = parsed_data.choices[0].delta.tool_calls[0].function.name
-                        name = name if name is not None else ""
-                        tool_call_name = name if tool_call_name == "" else tool_call_name
-                        call_id = parsed_data.choices[0].delta.tool_calls[0].id
-                        call_id = call_id if call_id is not None else ""
-                        tool_call_id = id if tool_call_id == "" else tool_call_id
-                        if not tool_call_id:
-                            tool_call_id = uuid.uuid4().hex[:16]
-                        arg = parsed_data.choices[0].delta.tool_calls[0].function.arguments
-                        tool_call_json += arg if arg is not None else ""
-                        
-                    logger.debug(f"{should_forward=}")
-                    if should_forward:
-                        logger.debug("forwarding message")
-                        yield SSEData.model_validate_json(sse.data).model_dump_json()
-                        
-                    last = parsed_data
+                                if should_forward:
+                                    # content chunks are passed through as received
+                                    yield data
+                except httpx.TimeoutException:
+                    # the request itself ran out of the budget, before or while the answer started
+                    if deadline.seconds is None:
+                        raise
+                    timed_out = True
+                    # the connect timeout stays capped by the client setting, it can fire first
+                    upstream_timeout = not deadline.expired
                     
-        assert last is not None
-        assert last.choices[0].finish_reason is not None
+                metrics.inference_duration.observe(model_name, value=time.monotonic() - started)
+                if timed_out:
+                    if upstream_timeout:
+                        logger.warning("inference server timed out")
+                    else:
+                        logger.warning(f"deadline of {deadline.seconds}s exceeded waiting for inference")
+                    yield stopped_chunk(
+                        model_name, stopped_message(deadline, tool_rounds, upstream_timeout)
+                    )
+                    fully_done = True
+                    continue
+                
+                assert finish_reason is not None
         
-        if last.choices[0].finish_reason.value in ["stop", "length"]:
-            logger.debug("no tool calls found")
-            fully_done = True
-            continue
+                if finish_reason in ["stop", "length"]:
+                    logger.debug("no tool calls found")
+                    tool_call_accumulator.cancel()
+                    fully_done = True
+                    continue
             
-        logger.debug("tool calls found")
-        logger.debug(
-            f"{tool_call_name=} {tool_call_json=}"
-        )
+                logger.debug("tool calls found")
+                if deadline.expired or (
+                    max_tool_rounds is not None and tool_rounds >= max_tool_rounds
+                ):
+                    logger.warning(f"stopping after {tool_rounds} tool rounds")
+                    yield stopped_chunk(model_name, stopped_message(deadline, tool_rounds))
+                    fully_done = True
+                    continue
+                tool_rounds += 1
+            
+                tool_calls = tool_call_accumulator.to_tool_calls()
+                for tool_call in tool_calls:
+                    logger.debug(
+                        f"tool call: {tool_call.function.name} arguments: {tool_call.function.arguments}"
+                    )
         
-        msg = ChatCompletionRequestMessage(
-            role="assistant",
-            content=response_content,
-            tool_calls=[
-                ChatCompletionMessageToolCall(
-                    id=tool_call_id,
-                    type="function",
-                    function=Function1(name=tool_call_name, arguments=tool_call_json),
+                msg = ChatCompletionRequestMessage(
+                    role="assistant",
+                    content="".join(response_content),
+                    tool_calls=tool_calls,
                 )
-            ],
-        )
-        request.messages.append(msg)
-        
-        tool_call_result = await call_tool(
-            tool_call_name, tool_call_json, model_name=model_name
-        )
-        
-        if tool_call_result is None:
-            continue
-            
-        logger.debug(
-            f"tool call result for {tool_call_name}: {tool_call_result.model_dump()}"
-        )
-        logger.debug(f"tool call result content: {tool_call_result.content}")
+                request.messages.append(msg)
         
-        tools_content = [
-            {"type": "text", "text": part.text}
-            for part in filter(lambda x: x.type == "text", tool_call_result.content)
-        ]
+                # run the calls concurrently, results come back in tool_call order
+                with tracer.span("tool_calls", count=len(tool_calls)):
+                    tool_call_results = await tool_call_accumulator.call_tools()
         
-        if len(tools_content) == 0:
-            tools_content = [{"type": "text", "text": "the tool call result is empty"}]
+                for tool_call, tool_call_result in zip(tool_calls, tool_call_results):
+                    if tool_call_result is None:
+                        continue
+                
+                    logger.debug(
+                        f"tool call result for {tool_call.function.name}: {tool_call_result.model_dump()}"
+                    )
+                    logger.debug(f"tool call result content: {tool_call_result.content}")
             
-        request.messages.append(
-            ChatCompletionRequestMessage.model_validate(
-                {
-                    "role": "tool",
-                    "content": tools_content,
-                    "tool_call_id": tool_call_id,
-                }
-            )
-        )
+                    request.messages.append(tool_result_message(tool_call.id, tool_call_result))
         
-        logger.debug("sending next iteration of chat completion request")
+                logger.debug("sending next iteration of chat completion request")
+    finally:
+        # the client went away or the stream failed, stop tool calls that were started early
+        if tool_call_accumulator is not None:
+            tool_call_accumulator.cancel()
+        metrics.chat_completion_rounds.observe(model_name, value=inference_rounds)
+        tracer.end_trace(trace)
         
     logger.debug("sending final event")
     yield ServerSentEvent(event="message", data="[DONE]", id=None, retry=None)
\ No newline at end of file
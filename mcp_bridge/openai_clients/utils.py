@@ -1,70 +1,80 @@
-from typing import Optional
+import asyncio
+import uuid
+from typing import Any, Coroutine, Iterable, Optional, TypeVar
 from loguru import logger
-from lmos_openai_types import CreateChatCompletionRequest
+from lmos_openai_types import (
+    ChatCompletionMessageToolCall,
+    ChatCompletionRequestMessage,
+    ChatCompletionTool,
+    CreateChatCompletionRequest,
+)
 import mcp.types
 import json
 from mcp_bridge.mcp_clients.McpClientManager import ClientManager
 from mcp_bridge.tool_mappers import mcp2openai
-from mcp_bridge.config import config
+from mcp_bridge.config import config, policy
+from mcp_bridge.config.policy import MAX_MEMOIZED_MODELS
+from mcp_bridge.tracing import tracer
+
+T = TypeVar("T")
+
+# bounds the number of tool calls in flight across all requests
+tool_call_semaphore = asyncio.Semaphore(config.tool_calls.max_concurrency)
+
+# model name -> (catalog version, [(server name, tools)])
+_visible_tools: dict[str, tuple[int, list[tuple[str, list[ChatCompletionTool]]]]] = {}
+
+
+def visible_tools(model_name: str) -> list[tuple[str, list[ChatCompletionTool]]]:
+    """The converted tools a model may see per server, memoized until a catalog changes"""
+    cached = _visible_tools.get(model_name)
+    if cached is not None and cached[0] == ClientManager.catalog_version:
+        return cached[1]
+
+    result = []
+    for name in policy.servers_for_model(model_name):
+        catalog = ClientManager.catalogs.get(name)
+        if catalog is None:
+            continue
+
+        result.append(
+            (
+                name,
+                [
+                    mcp2openai(tool)
+                    for tool in catalog.tools
+                    if policy.allows_tool(name, tool.name)
+                ],
+            )
+        )
+
+    if len(_visible_tools) >= MAX_MEMOIZED_MODELS:
+        _visible_tools.clear()
+    _visible_tools[model_name] = (ClientManager.catalog_version, result)
+    return result
+
 
 async def chat_completion_add_tools(request: CreateChatCompletionRequest):
     model_name = request.model
     request.tools = []
     logger.debug(f"Adding tools for model: {model_name}")
-    for name, session in ClientManager.get_clients():
-        server_config = config.mcp_servers.get(name, {})
-        allowed_models = server_config.allowed_models
-        disallowed_models = server_config.disallowed_models
-        allowed_tools = server_config.allowed_tools
-        disallowed_tools = server_config.disallowed_tools
-        
-        # Check model-level access first
-        if (allowed_models is not None and disallowed_models is not None and
-            model_name in allowed_models and model_name in disallowed_models):
-            logger.error(f"Configuration error for server '{name}': Model '{model_name}' appears in both allowed_models and disallowed_models")
+
+    await ClientManager.refresh_expired_catalogs(policy.servers_for_model(model_name))
+
+    for name, tools in visible_tools(model_name):
+        client = ClientManager.clients.get(name)
+        if client is None or not client.is_available():
+            logger.error(f"session is `None` for {name}")
             continue
-            
-        if ((allowed_models is None or model_name in allowed_models) and
-            (disallowed_models is None or model_name not in disallowed_models)):
-            if session.session is None:
-                logger.error(f"session is `None` for {session.name}")
-                continue
-                
-            logger.debug(f"Adding tools from server: {name}")
-            tools_result = await session.session.list_tools()
-            
-            # Check for tool-level conflicts (same tool in both allowed and disallowed lists)
-            if allowed_tools is not None and disallowed_tools is not None:
-                common_tools = set(allowed_tools) & set(disallowed_tools)
-                if common_tools:
-                    logger.error(f"Configuration error for server '{name}': Tools {common_tools} appear in both allowed_tools and disallowed_tools")
-                    continue
-            
-            # Filter tools based on allowed_tools and disallowed_tools settings
-            for tool in tools_result.tools:
-                should_add_tool = True
-                
-                if allowed_tools is not None and tool.name not in allowed_tools:
-                    should_add_tool = False
-                    logger.debug(f"Skipping tool '{tool.name}' from server '{name}' - not in allowed_tools list")
-                
-                if disallowed_tools is not None and tool.name in disallowed_tools:
-                    should_add_tool = False
-                    logger.debug(f"Skipping tool '{tool.name}' from server '{name}' - in disallowed_tools list")
-                
-                if should_add_tool:
-                    logger.debug(f"Adding {tool.name} from server {name}")
-                    request.tools.append(mcp2openai(tool))
-        else:
-            if allowed_models is not None and model_name not in allowed_models:
-                logger.debug(f"Skipping tools from server '{name}' - model '{model_name}' not in allowed_models: {allowed_models}")
-            if disallowed_models is not None and model_name in disallowed_models:
-                logger.debug(f"Skipping tools from server '{name}' - model '{model_name}' in disallowed_models: {disallowed_models}")
+
+        logger.debug(f"Adding {len(tools)} tools from server: {name}")
+        request.tools.extend(tools)
     
     return request
 
+
 async def call_tool(
-    tool_call_name: str, tool_call_json: str, timeout: Optional[int] = None, model_name: Optional[str] = None
+    tool_call_name: str, tool_call_json: str, timeout: Optional[float] = None, model_name: Optional[str] = None
 ) -> Optional[mcp.types.CallToolResult]:
     if tool_call_name == "" or tool_call_name is None:
         logger.error("tool call name is empty")
@@ -73,92 +83,37 @@ async def call_tool(
         logger.error("tool call json is empty")
         return None
         
-    session = await ClientManager.get_client_from_tool(tool_call_name)
+    # prefer a server the model may use, fall back to the first one for the error message
+    session = await ClientManager.get_client_from_tool(
+        tool_call_name, model_name
+    ) or await ClientManager.get_client_from_tool(tool_call_name)
     if session is None:
         logger.error(f"session is `None` for {tool_call_name}")
         return None
         
-    if model_name is not None:
-        server_config = config.mcp_servers.get(session.name, {})
-        allowed_models = server_config.allowed_models
-        disallowed_models = server_config.disallowed_models
-        allowed_tools = server_config.allowed_tools
-        disallowed_tools = server_config.disallowed_tools
+    if model_name is not None and not policy.allows_model(session.name, model_name):
+        logger.warning(f"Tool '{tool_call_name}' from server '{session.name}' cannot be used with model '{model_name}'")
+        return mcp.types.CallToolResult(
+            content=[
+                mcp.types.TextContent(
+                    type="text",
+                    text=f"Tool '{tool_call_name}' is not allowed for the model '{model_name}'."
+                )
+            ],
+            isError=True,
+        )
         
-        # Check model-level access
-        if (allowed_models is not None and disallowed_models is not None and
-            model_name in allowed_models and model_name in disallowed_models):
-            logger.error(f"Configuration error for server '{session.name}': Model '{model_name}' appears in both allowed_models and disallowed_models")
-            return mcp.types.CallToolResult(
-                content=[
-                    mcp.types.TextContent(
-                        type="text",
-                        text=f"Configuration error: Model '{model_name}' appears in both allowed_models and disallowed_models for tool '{tool_call_name}'."
-                    )
-                ],
-                isError=True,
-            )
-            
-        if allowed_models is not None and model_name not in allowed_models:
-            logger.warning(f"Tool '{tool_call_name}' from server '{session.name}' cannot be used with model '{model_name}' (not in allowed_models)")
-            return mcp.types.CallToolResult(
-                content=[
-                    mcp.types.TextContent(
-                        type="text",
-                        text=f"Tool '{tool_call_name}' is not allowed for the model '{model_name}'."
-                    )
-                ],
-                isError=True,
-            )
-            
-        if disallowed_models is not None and model_name in disallowed_models:
-            logger.warning(f"Tool '{tool_call_name}' from server '{session.name}' cannot be used with model '{model_name}' (in disallowed_models)")
-            return mcp.types.CallToolResult(
-                content=[
-                    mcp.types.TextContent(
-                        type="text",
-                        text=f"Tool '{tool_call_name}' is not allowed for the model '{model_name}'."
-                    )
-                ],
-                isError=True,
-            )
-        
-        # Check tool-level access
-        if allowed_tools is not None and disallowed_tools is not None and tool_call_name in allowed_tools and tool_call_name in disallowed_tools:
-            logger.error(f"Configuration error for server '{session.name}': Tool '{tool_call_name}' appears in both allowed_tools and disallowed_tools")
-            return mcp.types.CallToolResult(
-                content=[
-                    mcp.types.TextContent(
-                        type="text",
-                        text=f"Configuration error: Tool '{tool_call_name}' appears in both allowed_tools and disallowed_tools lists."
-                    )
-                ],
-                isError=True,
-            )
-            
-        if allowed_tools is not None and tool_call_name not in allowed_tools:
-            logger.warning(f"Tool '{tool_call_name}' from server '{session.name}' cannot be used (not in allowed_tools)")
-            return mcp.types.CallToolResult(
-                content=[
-                    mcp.types.TextContent(
-                        type="text",
-                        text=f"Tool '{tool_call_name}' is not in the allowed tools list."
-                    )
-                ],
-                isError=True,
-            )
-            
-        if disallowed_tools is not None and tool_call_name in disallowed_tools:
-            logger.warning(f"Tool '{tool_call_name}' from server '{session.name}' cannot be used (in disallowed_tools)")
-            return mcp.types.CallToolResult(
-                content=[
-                    mcp.types.TextContent(
-                        type="text",
-                        text=f"Tool '{tool_call_name}' is in the disallowed tools list."
-                    )
-                ],
-                isError=True,
-            )
+    if model_name is not None and not policy.allows_tool(session.name, tool_call_name):
+        logger.warning(f"Tool '{tool_call_name}' from server '{session.name}' cannot be used (not allowed by allowed_tools/disallowed_tools)")
+        return mcp.types.CallToolResult(
+            content=[
+                mcp.types.TextContent(
+                    type="text",
+                    text=f"Tool '{tool_call_name}' is not in the allowed tools list."
+                )
+            ],
+            isError=True,
+        )
             
     try:
         tool_call_args = json.loads(tool_call_json)
@@ -166,4 +121,59 @@ async def call_tool(
         logger.error(f"failed to decode json for {tool_call_name}")
         return None
         
-    return await session.call_tool(tool_call_name, tool_call_args, timeout)
\ No newline at end of file
+    with tracer.span("call_tool", tool=tool_call_name, server=session.name):
+        async with tool_call_semaphore:
+            return await session.call_tool(tool_call_name, tool_call_args, timeout)
+
+
+async def call_tools(
+    tool_calls: list[ChatCompletionMessageToolCall],
+    model_name: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> list[Optional[mcp.types.CallToolResult]]:
+    """Run the tool calls of one assistant turn concurrently, results keep the order of `tool_calls`"""
+    return await gather_or_cancel(
+        call_tool(
+            tool_call.function.name,
+            tool_call.function.arguments,
+            timeout=timeout,
+            model_name=model_name,
+        )
+        for tool_call in tool_calls
+    )
+
+
+async def gather_or_cancel(coros: Iterable[Coroutine[Any, Any, T]]) -> list[T]:
+    """Like `asyncio.gather`, but cancels the other calls once one of them fails so they release their permits"""
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def tool_result_message(
+    tool_call_id: Optional[str], tool_call_result: mcp.types.CallToolResult
+) -> ChatCompletionRequestMessage:
+    """Build the `tool` message which is sent back to the inference server"""
+    tools_content = [
+        {"type": "text", "text": part.text}
+        for part in filter(lambda x: x.type == "text", tool_call_result.content)
+    ]
+
+    if len(tools_content) == 0:
+        tools_content = [{"type": "text", "text": "the tool call result is empty"}]
+
+    if not tool_call_id or not tool_call_id.strip():
+        tool_call_id = uuid.uuid4().hex[:16]
+
+    return ChatCompletionRequestMessage.model_validate(
+        {
+            "role": "tool",
+            "content": tools_content,
+            "tool_call_id": tool_call_id,
+        }
+    )
\ No newline at end of file
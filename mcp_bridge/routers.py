@@ -4,6 +4,8 @@ from mcp_bridge.auth import get_api_key
 from mcp_bridge.endpoints import router as endpointRouter
 from mcp_bridge.mcpManagement import router as mcpRouter
 from mcp_bridge.health import router as healthRouter
+from mcp_bridge.metrics import router as metricsRouter
+from mcp_bridge.tracing import router as tracingRouter
 from mcp_bridge.mcp_server import router as mcp_server_router
 
 secure_router = APIRouter(dependencies=[Depends(get_api_key)])
@@ -11,7 +13,9 @@ secure_router = APIRouter(dependencies=[Depends(get_api_key)])
 secure_router.include_router(endpointRouter)
 secure_router.include_router(mcpRouter)
 secure_router.include_router(mcp_server_router)
+secure_router.include_router(tracingRouter)
 
 public_router = APIRouter()
 
 public_router.include_router(healthRouter)
+public_router.include_router(metricsRouter)
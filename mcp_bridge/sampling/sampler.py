@@ -7,6 +7,7 @@ from mcp.types import CreateMessageRequestParams, CreateMessageResult
 from mcp_bridge.config import config
 from mcp_bridge.openai_clients.genericHttpxClient import get_client
 from mcp_bridge.sampling.modelSelector import find_best_model
+from mcp_bridge.tracing import tracer
 
 def make_message(x: SamplingMessage):
     if x.content.type == "text":
@@ -52,8 +53,8 @@ async def handle_sampling_message(
 
     logger.debug(request)
 
-    async with get_client() as client:
-        resp = await client.post(
+    with tracer.trace("sampling", model=model.model):
+        resp = await get_client().post(
             "/chat/completions",
             json=request,
             timeout=config.sampling.timeout,
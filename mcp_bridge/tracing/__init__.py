@@ -0,0 +1,4 @@
+from .router import router
+from .tracer import tracer
+
+__all__ = ["router", "tracer"]
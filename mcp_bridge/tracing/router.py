@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from .tracer import tracer
+from mcp_bridge.openapi_tags import Tag
+
+router = APIRouter(prefix="/traces", tags=[Tag.health])
+
+
+@router.get("")
+async def list_traces():
+    """Summaries of the buffered traces, newest first"""
+    return [trace.summary() for trace in reversed(tracer.traces)]
+
+
+@router.get("/chrome")
+async def export_traces():
+    """All buffered traces in the Chrome trace format, open the file in Perfetto or chrome://tracing"""
+    return tracer.export_chrome()
+
+
+@router.get("/{trace_id}")
+async def get_trace(trace_id: str):
+    """A single trace in the Chrome trace format"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"trace {trace_id} not found")
+    return tracer.export_chrome([trace])
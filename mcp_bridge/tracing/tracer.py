@@ -0,0 +1,200 @@
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+from mcp_bridge.config import config
+
+__all__ = ["Span", "Trace", "Tracer", "tracer"]
+
+
+class Span:
+    """A timed section of a trace, `end` is None while it is running"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.monotonic()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.monotonic()) - self.start
+
+
+class Trace:
+    """The spans of one request, the first span is the root"""
+
+    def __init__(self, name: str, attributes: dict[str, Any]) -> None:
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.root = Span(name, None, attributes)
+        self.spans: list[Span] = [self.root]
+        self.finished = False
+
+    def open_span(self, name: str, parent: Optional[Span], attributes: dict[str, Any]) -> Span:
+        span = Span(name, (parent or self.root).span_id, attributes)
+        self.spans.append(span)
+        return span
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.root.duration * 1000, 3),
+            "spans": len(self.spans),
+            "attributes": self.root.attributes,
+        }
+
+    def chrome_events(self, pid: int) -> list[dict[str, Any]]:
+        """Complete events of this trace, overlapping siblings are put on separate rows"""
+        events: list[dict[str, Any]] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": f"{self.root.name} {self.trace_id}"},
+            }
+        ]
+
+        # a row holds a stack of end times, a span fits if it nests inside the top one
+        rows: list[list[float]] = []
+        origin = self.root.start
+        spans = sorted(self.spans, key=lambda span: (span.start, -span.duration))
+        for span in spans:
+            end = span.start + span.duration
+            for row in rows:
+                while row and row[-1] <= span.start:
+                    row.pop()
+                if not row or end <= row[-1]:
+                    break
+            else:
+                row = []
+                rows.append(row)
+            row.append(end)
+
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": self.root.name,
+                    "ph": "X",
+                    "ts": round((span.start - origin) * 1_000_000, 1),
+                    "dur": round(span.duration * 1_000_000, 1),
+                    "pid": pid,
+                    "tid": rows.index(row),
+                    "args": {"span_id": span.span_id, "parent_id": span.parent_id, **span.attributes},
+                }
+            )
+
+        return events
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    In-process request tracing.
+
+    A sampled request gets a `Trace` which is carried in a context variable, so tasks
+    started for the request (tool calls) record their spans into it. Finished traces
+    are kept in a ring buffer and exported in the Chrome trace format.
+    """
+
+    def __init__(self, sample_rate: float, buffer_size: int) -> None:
+        self.sample_rate = sample_rate
+        self.traces: deque[Trace] = deque(maxlen=buffer_size)
+
+    def current(self) -> Optional[Trace]:
+        trace = _current_trace.get()
+        return trace if trace is not None and not trace.finished else None
+
+    def start_trace(self, name: str, **attributes: Any) -> Optional[Trace]:
+        """Start a trace for the current context if it is sampled"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+
+        trace = Trace(name, attributes)
+        _current_trace.set(trace)
+        _current_span.set(trace.root)
+        return trace
+
+    def end_trace(self, trace: Optional[Trace]) -> None:
+        if trace is None or trace.finished:
+            return
+
+        trace.root.end = time.monotonic()
+        trace.finished = True
+        self.traces.append(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Record a span in the current trace, does nothing when the request is not traced"""
+        trace = self.current()
+        if trace is None:
+            yield None
+            return
+
+        span = trace.open_span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end = time.monotonic()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # a generator may be closed from another context than it ran in
+                pass
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """A span of the current trace, or a trace of its own when there is none"""
+        if self.current() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+
+        trace_token = _current_trace.set(None)
+        span_token = _current_span.set(None)
+        trace = self.start_trace(name, **attributes)
+        try:
+            yield trace.root if trace is not None else None
+        finally:
+            self.end_trace(trace)
+            _current_trace.reset(trace_token)
+            _current_span.reset(span_token)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        for trace in self.traces:
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def export_chrome(self, traces: Optional[list[Trace]] = None) -> dict[str, Any]:
+        """Traces in the Chrome trace event format, loadable in Perfetto or chrome://tracing"""
+        if traces is None:
+            traces = list(self.traces)
+
+        events: list[dict[str, Any]] = []
+        for pid, trace in enumerate(traces, start=1):
+            events.extend(trace.chrome_events(pid))
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+tracer = Tracer(
+    sample_rate=config.tracing.sample_rate,
+    buffer_size=config.tracing.buffer_size,
+)